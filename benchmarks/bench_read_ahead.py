@@ -0,0 +1,68 @@
+"""
+Read-ahead window benchmark.
+
+Drives bot.streamer.read_ahead with a consumer that keeps up with Telegram
+and one that drains chunks slower than they are fetched, and reports how
+many chunks each keeps fetched ahead once the window has settled. A slow
+consumer should hold about latency / drain time + 1 chunks, not the
+maximum; the script exits non-zero if it does not.
+
+Usage:
+    python benchmarks/bench_read_ahead.py [--latency 0.01] [--slow 0.1]
+"""
+
+import os
+import sys
+import math
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import bot.streamer as streamer  # noqa: E402
+
+
+async def run(chunks: int, max_in_flight: int, latency: float, drain: float) -> float:
+    """Stream chunks through read_ahead and return the settled read-ahead window."""
+    started = 0
+    consumed = 0
+    samples = []
+
+    async def fetch(index: int) -> bytes:
+        nonlocal started
+        started += 1
+        await asyncio.sleep(latency)
+        return b"x"
+
+    async for _ in streamer.read_ahead(fetch, 0, chunks - 1, max_in_flight):
+        consumed += 1
+        await asyncio.sleep(drain)
+        # Fetches started beyond this chunk, plus the chunk being drained
+        samples.append(started - consumed + 1)
+
+    # Skip the warm-up and the tail, where the window is not fully used
+    settled = samples[len(samples) // 3:len(samples) - max_in_flight]
+    return sum(settled) / len(settled)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=60, help="chunks per stream")
+    parser.add_argument("--max", type=int, default=8, help="maximum fetches in flight")
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated fetch latency (s)")
+    parser.add_argument("--slow", type=float, default=0.1, help="time the slow consumer takes per chunk (s)")
+    args = parser.parse_args()
+
+    fast = asyncio.run(run(args.chunks, args.max, args.latency, 0))
+    slow = asyncio.run(run(args.chunks, args.max, args.latency, args.slow))
+    expected = min(args.max, math.ceil(args.latency / args.slow) + 1)
+
+    print(f"fast consumer: window {fast:4.1f} (max {args.max})")
+    print(f"slow consumer: window {slow:4.1f} (expected about {expected})")
+
+    if slow >= fast or slow > expected + 1:
+        sys.exit("Slow consumer did not shrink the read-ahead window")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,11 @@ import asyncio
 import logging
 from config import Config
 from database import connect_database, disconnect_database
+from database.stats import stats_buffer
+from database.file_index import file_index
 from bot.client import start_bot, stop_bot
-from bot.workers import start_workers, stop_workers
+from bot.workers import start_workers, stop_workers, get_streaming_clients
+from bot.streamer import warm_media_sessions, close_media_sessions
 from web import start_web_server, stop_web_server
 from utils.logger import setup_logger
 
@@ -49,6 +52,12 @@ async def main():
         # Connect to database
         await connect_database()
         
+        # Start batching stats writes
+        stats_buffer.start()
+        
+        # Load recent file records for the streaming routes
+        await file_index.warm()
+        
         # Start main bot FIRST (this resolves and caches LOG_CHANNEL)
         # Workers need the resolved channel ID before they can cache it
         await start_bot()
@@ -60,6 +69,10 @@ async def main():
         from bot.workers import cache_log_channel_for_workers
         await cache_log_channel_for_workers()
         
+        # Connect every streaming bot to every DC before the first viewer arrives
+        if Config.WARM_MEDIA_SESSIONS:
+            await warm_media_sessions(get_streaming_clients())
+        
         # Start web server
         await start_web_server()
         
@@ -81,8 +94,10 @@ async def main():
     finally:
         # Cleanup
         await stop_web_server()
+        await close_media_sessions()
         await stop_bot()
         await stop_workers()
+        await stats_buffer.stop()
         await disconnect_database()
         logger.info("Bot stopped")
 
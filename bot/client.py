@@ -5,6 +5,7 @@ Main Pyrogram client for the bot.
 from pyrogram import Client
 from pyrogram.errors import PeerIdInvalid, ChannelInvalid
 from config import Config
+from bot.workers import worker_pool
 from utils.logger import logger
 
 StreamBot: Client = None
@@ -85,6 +86,8 @@ async def start_bot() -> Client:
         
         if log_channel:
             log_channel_peer = log_channel
+            # The main bot always streams; workers join once they cache the channel
+            worker_pool.add(StreamBot, bot_username)
             # Update config with resolved ID for future use
             Config.LOG_CHANNEL = log_channel.id
             logger.info(f"Log channel cached: {log_channel.title} (ID: {log_channel.id})")
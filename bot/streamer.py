@@ -0,0 +1,773 @@
+"""
+Chunk streaming engine for log channel files.
+Fetches aligned file parts with raw upload.GetFile over pools of persistent media
+sessions, scheduled across the main bot and workers, with several requests in flight
+per stream. Slow fetches are hedged with a duplicate request on another client.
+"""
+
+import os
+import json
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from pyrogram import Client, raw
+from pyrogram.errors import (
+    AuthBytesInvalid, BadRequest, ChannelInvalid, ChannelPrivate, FileReferenceExpired,
+    FileReferenceInvalid, Forbidden, PeerIdInvalid, Unauthorized
+)
+from pyrogram.file_id import FileId, FileType
+from pyrogram.session import Session
+from pyrogram.session.auth import Auth
+from config import Config
+from bot.workers import get_main_bot, get_streaming_clients, mark_channel_unavailable, worker_pool
+from utils.chunk_cache import chunk_cache
+from database.file_index import file_index
+from database.files import update_file_reference
+from utils.file_properties import get_file_id, decode_file_location
+from utils.message_cache import message_cache
+from utils.singleflight import SingleFlight
+from utils.logger import logger
+
+# Chunk size for streaming (1MB, the largest upload.GetFile limit)
+CHUNK_SIZE = 1024 * 1024
+
+# Precise upload.GetFile requests must be 1KB aligned and stay inside one 1MB chunk
+PRECISE_ALIGNMENT = 1024
+
+# First delay between retries of a failed chunk fetch (doubled on each retry)
+RETRY_BACKOFF = 0.5
+
+# Failures that retrying the same request cannot fix
+PERMANENT_ERRORS = (FileNotFoundError, BadRequest, Forbidden, Unauthorized)
+
+# Identical concurrent chunk requests (viewers of the same file) share one fetch
+chunk_fetches = SingleFlight()
+
+# Telegram DCs media sessions are opened to at startup (the test servers have three)
+DC_IDS = (1, 2, 3, 4, 5)
+TEST_DC_IDS = (1, 2, 3)
+
+# Seconds to wait for one media session while warming up
+WARMUP_TIMEOUT = 30
+
+# Seconds to wait for a media session to start (or a stored auth key to work)
+SESSION_START_TIMEOUT = 10
+
+# Media session warm-up time in seconds by client name and DC (None if it failed)
+media_warmup: Dict[str, Dict[int, Optional[float]]] = {}
+
+# Media session pools by client name and DC
+_media_pools: Dict[Tuple[str, int], "MediaSessionPool"] = {}
+
+# Media sessions of a client are created one at a time per DC
+_media_session_locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+
+
+class MediaSessionPool:
+    """
+    Media sessions of one client to one DC, all sharing its auth key.
+    Each request goes to the session with the fewest requests in flight;
+    once every session has max_in_flight running, requests wait for a slot.
+    """
+
+    def __init__(self, sessions: List[Session], max_in_flight: int):
+        self.sessions = sessions
+        self.max_in_flight = max(1, max_in_flight)
+        self._in_flight = [0] * len(sessions)
+        self._slots = asyncio.Semaphore(len(sessions) * self.max_in_flight)
+        self.requests = 0
+        self.waits = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Requests running on all sessions."""
+        return sum(self._in_flight)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Session]:
+        """Get the least-busy session for one request."""
+        if self._slots.locked():
+            self.waits += 1
+        await self._slots.acquire()
+
+        # A free slot means some session is below the limit
+        index = min(range(len(self.sessions)), key=self._in_flight.__getitem__)
+        self._in_flight[index] += 1
+        self.requests += 1
+        try:
+            yield self.sessions[index]
+        finally:
+            self._in_flight[index] -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Get pool counters."""
+        return {
+            "sessions": len(self.sessions),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "waits": self.waits
+        }
+
+
+async def get_media_pool(client: Client, dc_id: int) -> MediaSessionPool:
+    """
+    Get the pool of persistent media sessions of a client for a DC, opening
+    it on first use. Pyrogram's get_file opens a new session for every call,
+    which makes per-chunk requests far too expensive to run concurrently,
+    and a single session caps throughput at what one connection can carry.
+    Pools of different DCs are opened in parallel.
+    """
+    key = (client.name, dc_id)
+    pool = _media_pools.get(key)
+    if pool:
+        return pool
+
+    lock = _media_session_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        pool = _media_pools.get(key)
+        if pool:
+            return pool
+
+        test_mode = await client.storage.test_mode()
+        session = await open_media_session(client, dc_id, test_mode)
+
+        # Further connections reuse the authorized key
+        starts = [
+            asyncio.ensure_future(start_media_session(client, dc_id, session.auth_key, test_mode))
+            for _ in range(Config.MEDIA_SESSIONS_PER_DC - 1)
+        ]
+        try:
+            extra = await asyncio.gather(*starts, return_exceptions=True)
+        except BaseException:
+            # Cancelled (e.g. by the warm-up timeout): stop every session opened so far
+            for start in starts:
+                start.cancel()
+            extra = await asyncio.gather(*starts, return_exceptions=True)
+            for result in [session, *extra]:
+                if isinstance(result, Session):
+                    await stop_media_session(result)
+            raise
+
+        sessions = [session]
+        for result in extra:
+            if isinstance(result, BaseException):
+                logger.warning(f"Could not open an extra media session to DC {dc_id} on {client.name}: {result!r}")
+            else:
+                sessions.append(result)
+
+        # Pyrogram stops the first session with the client
+        client.media_sessions[dc_id] = session
+        pool = MediaSessionPool(sessions, Config.MEDIA_SESSION_MAX_IN_FLIGHT)
+        _media_pools[key] = pool
+        logger.debug(f"Opened {len(sessions)} media sessions to DC {dc_id} on {client.name}")
+        return pool
+
+
+async def open_media_session(client: Client, dc_id: int, test_mode: bool) -> Session:
+    """Open an authorized media session to a DC."""
+    if dc_id == await client.storage.dc_id():
+        return await start_media_session(client, dc_id, await client.storage.auth_key(), test_mode)
+
+    return (
+        await open_stored_media_session(client, dc_id, test_mode)
+        or await create_media_session(client, dc_id, test_mode)
+    )
+
+
+async def start_media_session(client: Client, dc_id: int, auth_key: bytes, test_mode: bool) -> Session:
+    """Start a media session with an auth key that is already authorized."""
+    session = Session(client, dc_id, auth_key, test_mode, is_media=True)
+    try:
+        await asyncio.wait_for(session.start(), SESSION_START_TIMEOUT)
+    except BaseException:
+        await stop_media_session(session)
+        raise
+    return session
+
+
+async def stop_media_session(session: Session) -> None:
+    """Stop a media session, ignoring errors from a half-started one."""
+    try:
+        await session.stop()
+    except Exception:
+        pass
+
+
+def get_media_pool_stats(client: Client) -> Dict[int, Dict[str, int]]:
+    """Get the counters of a client's media session pools by DC."""
+    return {dc_id: pool.stats() for (name, dc_id), pool in _media_pools.items() if name == client.name}
+
+
+async def close_media_sessions() -> None:
+    """Stop the media sessions Pyrogram does not know about (all but the first of each pool)."""
+    for pool in _media_pools.values():
+        for session in pool.sessions[1:]:
+            await stop_media_session(session)
+    _media_pools.clear()
+
+
+async def open_stored_media_session(client: Client, dc_id: int, test_mode: bool) -> Optional[Session]:
+    """Open a media session with an auth key authorized in a previous run, if it still works."""
+    auth_key = load_media_auth_keys(client).get(dc_id)
+    if auth_key is None:
+        return None
+
+    try:
+        session = await start_media_session(client, dc_id, auth_key, test_mode)
+    except Exception as e:
+        logger.info(f"Stored auth key for DC {dc_id} on {client.name} no longer works ({e!r}), creating a new one")
+        return None
+
+    try:
+        # Fails with AUTH_KEY_UNREGISTERED if the authorization is gone
+        await asyncio.wait_for(
+            session.invoke(raw.functions.users.GetUsers(id=[raw.types.InputUserSelf()])),
+            SESSION_START_TIMEOUT
+        )
+    except Exception as e:
+        logger.info(f"Stored auth key for DC {dc_id} on {client.name} no longer works ({e!r}), creating a new one")
+        await stop_media_session(session)
+        return None
+    except BaseException:
+        await stop_media_session(session)
+        raise
+
+    return session
+
+
+async def create_media_session(client: Client, dc_id: int, test_mode: bool) -> Session:
+    """Create an auth key for a DC, import the client's authorization into it and store it."""
+    auth_key = await Auth(client, dc_id, test_mode).create()
+    session = await start_media_session(client, dc_id, auth_key, test_mode)
+
+    try:
+        for _ in range(3):
+            exported_auth = await client.invoke(
+                raw.functions.auth.ExportAuthorization(dc_id=dc_id)
+            )
+
+            try:
+                await session.invoke(
+                    raw.functions.auth.ImportAuthorization(
+                        id=exported_auth.id,
+                        bytes=exported_auth.bytes
+                    )
+                )
+            except AuthBytesInvalid:
+                continue
+            else:
+                break
+        else:
+            raise AuthBytesInvalid
+    except BaseException:
+        # Also on cancellation, so a half-authorized session is not left running
+        await stop_media_session(session)
+        raise
+
+    save_media_auth_key(client, dc_id, auth_key)
+    return session
+
+
+def get_media_keys_path(client: Client) -> str:
+    """File holding a client's auth keys for other DCs, next to its session file."""
+    return os.path.join(str(client.workdir), f"{client.name}.media_keys.json")
+
+
+def load_media_auth_keys(client: Client) -> Dict[int, bytes]:
+    """Read the auth keys a client has authorized on other DCs."""
+    try:
+        with open(get_media_keys_path(client), "r", encoding="utf-8") as f:
+            keys = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read media auth keys of {client.name}: {e}")
+        return {}
+
+    return {int(dc_id): bytes.fromhex(key) for dc_id, key in keys.items()}
+
+
+def save_media_auth_key(client: Client, dc_id: int, auth_key: bytes) -> None:
+    """Store an authorized auth key so the next run can reuse it."""
+    keys = load_media_auth_keys(client)
+    keys[dc_id] = auth_key
+    path = get_media_keys_path(client)
+
+    try:
+        # Auth keys are as sensitive as the session file itself
+        fd = os.open(f"{path}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({str(dc): key.hex() for dc, key in keys.items()}, f)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logger.warning(f"Could not store media auth key of {client.name} for DC {dc_id}: {e}")
+
+
+async def warm_media_sessions(clients: List[Client]) -> None:
+    """
+    Open the media session pool to every DC for every streaming client, all in
+    parallel, so the first stream from a DC does not wait for key exchange
+    and authorization. Warm-up times are kept in media_warmup.
+    """
+    async def warm(client: Client, dc_id: int) -> None:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(get_media_pool(client, dc_id), WARMUP_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Could not open a media session to DC {dc_id} on {client.name}: {e!r}")
+            media_warmup.setdefault(client.name, {})[dc_id] = None
+        else:
+            media_warmup.setdefault(client.name, {})[dc_id] = time.monotonic() - started
+
+    started = time.monotonic()
+    targets = []
+    for client in clients:
+        dc_ids = TEST_DC_IDS if await client.storage.test_mode() else DC_IDS
+        targets.extend((client, dc_id) for dc_id in dc_ids)
+
+    await asyncio.gather(*(warm(client, dc_id) for client, dc_id in targets))
+
+    for client in clients:
+        timings = media_warmup.get(client.name, {})
+        logger.info(f"Media sessions of {client.name}: " + ", ".join(
+            f"DC {dc_id} {'failed' if seconds is None else f'{seconds * 1000:.0f} ms'}"
+            for dc_id, seconds in sorted(timings.items())
+        ))
+
+    opened = sum(1 for client, dc_id in targets if media_warmup[client.name][dc_id] is not None)
+    logger.info(f"Opened {opened}/{len(targets)} media sessions in {time.monotonic() - started:.1f}s")
+
+
+def get_file_location(file_id: FileId):
+    """Build the raw input location for a decoded file ID."""
+    if file_id.file_type == FileType.PHOTO:
+        return raw.types.InputPhotoFileLocation(
+            id=file_id.media_id,
+            access_hash=file_id.access_hash,
+            file_reference=file_id.file_reference,
+            thumb_size=file_id.thumbnail_size
+        )
+
+    return raw.types.InputDocumentFileLocation(
+        id=file_id.media_id,
+        access_hash=file_id.access_hash,
+        file_reference=file_id.file_reference,
+        thumb_size=file_id.thumbnail_size
+    )
+
+
+def plan_chunk_request(index: int, start: int, end: int, file_size: int) -> Tuple[int, int, int, int]:
+    """
+    Plan the smallest legal upload.GetFile request for the part of chunk
+    `index` that falls inside the byte range [start, end].
+    Fully covered chunks are requested whole so they can be cached.
+    Returns (offset, limit, skip, take): bytes to request, then how many
+    bytes of the response to skip and keep.
+    """
+    chunk_start = index * CHUNK_SIZE
+    chunk_end = min(chunk_start + CHUNK_SIZE, file_size) - 1
+    first = max(start, chunk_start)
+    last = min(end, chunk_end)
+
+    if first == chunk_start and last == chunk_end:
+        offset, limit = chunk_start, CHUNK_SIZE
+    else:
+        offset = first - first % PRECISE_ALIGNMENT
+        limit = -(-(last + 1) // PRECISE_ALIGNMENT) * PRECISE_ALIGNMENT - offset
+
+    return offset, limit, first - offset, last - first + 1
+
+
+async def fetch_chunk(client: Client, file_id: FileId, offset: int, limit: int, sleep_threshold: int = 30) -> bytes:
+    """
+    Fetch limit bytes at offset of a file from Telegram.
+    The request must be planned by plan_chunk_request.
+    FloodWaits longer than sleep_threshold seconds are raised.
+    """
+    pool = await get_media_pool(client, file_id.dc_id)
+
+    async with pool.acquire() as session:
+        r = await session.invoke(
+            raw.functions.upload.GetFile(
+                location=get_file_location(file_id),
+                offset=offset,
+                limit=limit,
+                precise=True
+            ),
+            sleep_threshold=sleep_threshold
+        )
+
+    if not isinstance(r, raw.types.upload.File):
+        raise Exception(f"Unexpected upload.GetFile response: {type(r).__name__}")
+
+    return r.bytes
+
+
+async def fetch_with_retry(fetch: Callable[[], Awaitable[bytes]], description: str) -> bytes:
+    """
+    Run a chunk fetch with a timeout, retrying transient failures with
+    exponential backoff. Only the failing chunk is fetched again.
+    """
+    for attempt in range(Config.STREAM_CHUNK_RETRIES + 1):
+        try:
+            return await asyncio.wait_for(fetch(), Config.STREAM_CHUNK_TIMEOUT)
+        except PERMANENT_ERRORS:
+            raise
+        except Exception as e:
+            if attempt == Config.STREAM_CHUNK_RETRIES:
+                raise
+            delay = RETRY_BACKOFF * 2 ** attempt
+            logger.warning(f"Fetching {description} failed ({e!r}), retrying in {delay:g}s")
+            await asyncio.sleep(delay)
+
+
+class ReadAheadWindow:
+    """
+    Adaptive number of chunk fetches kept in flight for one stream.
+    Sized so fetch latency is covered by the rate the consumer drains
+    chunks (Little's law), bounded by STREAM_READ_AHEAD.
+    """
+
+    def __init__(self, max_size: int, alpha: float = 0.3):
+        self.max_size = max(1, max_size)
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.interval: Optional[float] = None
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return current + self.alpha * (value - current)
+
+    def observe_fetch(self, seconds: float) -> None:
+        """Record how long a chunk fetch took."""
+        self.latency = self._ewma(self.latency, seconds)
+
+    def observe_consume(self, seconds: float) -> None:
+        """Record the time the consumer took to come back for the next chunk."""
+        self.interval = self._ewma(self.interval, seconds)
+
+    @property
+    def size(self) -> int:
+        """Current number of fetches to keep in flight."""
+        if self.latency is None or not self.interval:
+            return math.ceil(self.max_size / 2)
+        return max(1, min(self.max_size, math.ceil(self.latency / self.interval) + 1))
+
+
+async def read_ahead(
+    fetch: Callable[[int], Awaitable[bytes]],
+    first: int,
+    last: int,
+    max_in_flight: int
+) -> AsyncGenerator[bytes, None]:
+    """
+    Fetch chunks first..last concurrently and yield them in order.
+    Outstanding fetches are cancelled if the consumer stops early.
+    """
+    window = ReadAheadWindow(max_in_flight)
+    pending = deque()
+    next_index = first
+
+    async def timed_fetch(index: int) -> bytes:
+        started = time.monotonic()
+        data = await fetch(index)
+        window.observe_fetch(time.monotonic() - started)
+        return data
+
+    try:
+        last_resume = None
+        while pending or next_index <= last:
+            while next_index <= last and len(pending) < window.size:
+                pending.append(asyncio.create_task(timed_fetch(next_index)))
+                next_index += 1
+
+            data = await pending.popleft()
+            yield data
+
+            # Resume to resume covers both waiting for the fetch and the
+            # time the consumer spent draining the chunk
+            now = time.monotonic()
+            if last_resume is not None:
+                window.observe_consume(now - last_resume)
+            last_resume = now
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class HedgePolicy:
+    """
+    Decides when a slow chunk fetch is hedged with a duplicate request.
+    The deadline is the p95 of recent fetch latencies, so about one fetch in
+    twenty is a hedging candidate. Hedges spend a token bucket refilled by
+    `budget` tokens per fetch, which caps the extra requests at that
+    fraction of all fetches (plus a small burst).
+    """
+
+    def __init__(self, budget: float, window: int = 500, min_samples: int = 50, burst: int = 10):
+        self.budget = budget
+        self.min_samples = min_samples
+        self.burst = burst
+        self._latencies = deque(maxlen=window)
+        self._deadline: Optional[float] = None
+        self._tokens = float(burst)
+        self.fetches = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency of a completed fetch."""
+        self._latencies.append(seconds)
+        # Recomputed every few samples; sorting the window each time is wasteful
+        if len(self._latencies) >= self.min_samples and len(self._latencies) % 10 == 0:
+            ordered = sorted(self._latencies)
+            self._deadline = ordered[int(len(ordered) * 0.95)]
+
+    def deadline(self) -> Optional[float]:
+        """Seconds to wait before hedging a fetch, or None if hedging is off."""
+        if self.budget <= 0 or len(worker_pool.clients) < 2:
+            return None
+        return self._deadline
+
+    def count_fetch(self) -> None:
+        """Count a fetch, adding its share to the hedging budget."""
+        self.fetches += 1
+        self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def allow(self) -> bool:
+        """Take a hedge from the budget, if there is one left."""
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.hedges += 1
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """Get hedging counters."""
+        return {
+            "deadline": self._deadline or 0.0,
+            "fetches": self.fetches,
+            "hedges": self.hedges,
+            "wins": self.wins
+        }
+
+
+# Slow chunk fetches get a second request on another client, within a budget
+chunk_hedging = HedgePolicy(Config.STREAM_HEDGE_BUDGET)
+
+
+class StreamSource:
+    """
+    A log channel file as seen by every streaming client.
+    File IDs (and their file references) are per client. The main bot uses
+    the location stored with the file record when there is one; other
+    clients resolve the message through the shared message cache on first use.
+    Each chunk goes to the least-loaded client in the worker pool and
+    fails over to the next one; a worker that cannot see the channel
+    is dropped from the pool.
+    """
+
+    def __init__(self, main_client: Client, message_id: int, stored_file_id: Optional[FileId] = None):
+        self.main_client = main_client
+        self.message_id = message_id
+        self.stored_file_id = stored_file_id
+        self._file_ids: Dict[str, FileId] = {}
+        if stored_file_id:
+            self._file_ids[main_client.name] = stored_file_id
+        # Chunks failing on the same stale reference share one refresh
+        self._refreshes = SingleFlight()
+
+    async def _resolve(self, client: Client, refresh: bool) -> FileId:
+        message, _ = await message_cache.get(client, self.message_id, refresh=refresh)
+        file_id_str = get_file_id(message) if message else None
+        if not file_id_str:
+            raise FileNotFoundError(f"Message {self.message_id} not found or has no media")
+        file_id = FileId.decode(file_id_str)
+        self._file_ids[client.name] = file_id
+
+        if self.stored_file_id and client is self.main_client and file_id.file_reference != self.stored_file_id.file_reference:
+            self.stored_file_id = file_id
+            try:
+                await update_file_reference(self.message_id, file_id.file_reference)
+            except Exception as e:
+                logger.warning(f"Could not store the new file reference of message {self.message_id}: {e}")
+        return file_id
+
+    async def get_file_id(self, client: Client, refresh: bool = False) -> FileId:
+        """Get the decoded file ID of the message for a client."""
+        if refresh:
+            return await self._refreshes.do(client.name, lambda: self._resolve(client, refresh=True))
+        if client.name not in self._file_ids:
+            return await self._resolve(client, refresh=False)
+        return self._file_ids[client.name]
+
+    async def fetch_from(self, client: Client, offset: int, limit: int, sleep_threshold: int) -> bytes:
+        """Fetch a chunk through one client, refreshing a stale file reference once."""
+        file_id = await self.get_file_id(client)
+        try:
+            return await fetch_chunk(client, file_id, offset, limit, sleep_threshold)
+        except (FileReferenceExpired, FileReferenceInvalid):
+            if self._file_ids.get(client.name) is file_id:
+                logger.warning(f"File reference expired for message {self.message_id} on {client.name}, refreshing")
+                file_id = await self.get_file_id(client, refresh=True)
+            else:
+                # Another chunk has already refreshed it
+                file_id = self._file_ids[client.name]
+            return await fetch_chunk(client, file_id, offset, limit, sleep_threshold)
+
+    async def fetch(self, offset: int, limit: int) -> bytes:
+        """
+        Fetch part of the file. If it takes longer than the hedging deadline,
+        the same part is also requested from another client; the first
+        response wins and the other request is cancelled.
+        """
+        tried: List[Client] = []
+        deadline = chunk_hedging.deadline()
+        chunk_hedging.count_fetch()
+
+        if deadline is None:
+            return await self._fetch(offset, limit, tried)
+
+        primary = asyncio.create_task(self._fetch(offset, limit, tried))
+        pending = {primary}
+        # Whatever is still running is cancelled if this fetch is, or once it has a result
+        try:
+            done, _ = await asyncio.wait(pending, timeout=deadline)
+            if done or worker_pool.pick(exclude=tried) is None or not chunk_hedging.allow():
+                return await primary
+
+            # The hedge avoids the clients the first request has used
+            hedge = asyncio.create_task(self._fetch(offset, limit, list(tried)))
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            chunk_hedging.wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fetch(self, offset: int, limit: int, tried: List[Client]) -> bytes:
+        """
+        Fetch part of the file from the least-loaded client, failing over to
+        the others. Clients are added to tried as they are used.
+        """
+        while True:
+            client = worker_pool.pick(exclude=tried)
+            if client is None:
+                client = self.main_client
+            tried.append(client)
+
+            # Let FloodWaits surface so the chunk can move to another client,
+            # unless this is the last client left to try
+            has_fallback = worker_pool.pick(exclude=tried) is not None
+            sleep_threshold = 0 if has_fallback else 30
+
+            try:
+                async with worker_pool.acquire(client):
+                    started = time.monotonic()
+                    data = await self.fetch_from(client, offset, limit, sleep_threshold)
+                    chunk_hedging.observe(time.monotonic() - started)
+                    return data
+            except (PeerIdInvalid, ChannelInvalid, ChannelPrivate) as e:
+                if not has_fallback:
+                    raise
+                if client is not self.main_client:
+                    # The worker cannot see the log channel at all
+                    logger.warning(f"{client.name} cannot read the log channel: {e}")
+                    mark_channel_unavailable(client)
+            except (FileNotFoundError, ValueError, KeyError) as e:
+                if not has_fallback:
+                    raise
+                # Only this file is unreadable through this client (e.g. its message is gone)
+                logger.warning(f"{client.name} cannot read message {self.message_id}: {e}")
+            except Exception as e:
+                if not has_fallback:
+                    raise
+                logger.warning(f"{client.name} failed to fetch offset {offset} of message {self.message_id}: {e}")
+
+
+async def stream_file_chunks(message_id: int, start: int, end: int):
+    """
+    Stream the bytes between start and end of a log channel file.
+    Chunks in the disk cache are read locally; the rest of the range is
+    fetched with the smallest aligned requests that cover it, spread
+    over the worker pool with up to STREAM_READ_AHEAD requests in flight
+    per streaming client, and written back to the cache. Concurrent
+    requests for the same part of a file share one Telegram fetch.
+    Each chunk fetch has its own timeout and retries, so a transient
+    failure costs that chunk, never bytes already sent.
+    Files with a stored location are fetched without looking up their
+    message; others go through the shared message cache. A message is only
+    refetched when Telegram rejects its file reference.
+    Yields bytes or memoryviews over the fetched buffers; nothing is copied.
+    """
+    first_chunk = start // CHUNK_SIZE
+    last_chunk = end // CHUNK_SIZE
+
+    main_bot = get_main_bot()
+    file_details = await file_index.get_details(message_id)
+
+    if file_details and file_details.location:
+        source = StreamSource(main_bot, message_id, decode_file_location(file_details.location))
+        file_unique_id = file_details.file_unique_id
+        file_size = file_details.file_size
+    else:
+        _, props = await message_cache.get(main_bot, message_id)
+        if not props:
+            raise FileNotFoundError(f"Message {message_id} not found or has no media")
+
+        source = StreamSource(main_bot, message_id)
+        file_unique_id = props["file_unique_id"]
+        file_size = props["file_size"]
+    use_cache = chunk_cache.enabled and bool(file_unique_id)
+
+    async def fetch(index: int) -> Union[bytes, memoryview]:
+        # Smallest aligned request covering this chunk's part of the range
+        chunk_start = index * CHUNK_SIZE
+        offset, limit, skip, take = plan_chunk_request(index, start, end, file_size)
+
+        if use_cache:
+            cached = await chunk_cache.read(file_unique_id, index, offset - chunk_start + skip, take)
+            if cached is not None:
+                return cached
+
+        chunk_data = await chunk_fetches.do(
+            (message_id, offset, limit),
+            lambda: fetch_with_retry(
+                lambda: source.fetch(offset, limit),
+                f"offset {offset} of message {message_id}"
+            )
+        )
+
+        # Only complete chunks are cached (the last one may be short)
+        if use_cache and limit == CHUNK_SIZE and len(chunk_data) == min(CHUNK_SIZE, file_size - chunk_start):
+            chunk_cache.store(file_unique_id, index, chunk_data)
+
+        if skip == 0 and take == len(chunk_data):
+            return chunk_data
+
+        # Slice through a memoryview so the response gets the bytes without a copy
+        return memoryview(chunk_data)[skip:skip + take]
+
+    max_in_flight = Config.STREAM_READ_AHEAD * len(get_streaming_clients())
+    chunks = read_ahead(fetch, first_chunk, last_chunk, max_in_flight)
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            if not chunk:
+                # Telegram returned nothing (end of file)
+                return
+            yield chunk
@@ -2,8 +2,13 @@
 Worker bot management for increased streaming capacity.
 """
 
-from typing import List, Optional
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Collection, Dict, List, Optional
 from pyrogram import Client
+from pyrogram.errors import FloodWait
 from pyrogram.raw import functions
 from pyrogram.raw.types import InputChannel, InputPeerChannel
 from config import Config
@@ -11,7 +16,133 @@ from utils.logger import logger
 
 # List of worker clients
 workers: List[Client] = []
-current_worker_index: int = 0
+
+# Consecutive errors before a client is cooled down, and for how long (seconds)
+ERROR_THRESHOLD = 3
+ERROR_COOLDOWN = 30
+
+
+@dataclass
+class ClientState:
+    """Live scheduling state of one streaming client."""
+    client: Client
+    username: str = ""
+    in_flight: int = 0
+    latency: Optional[float] = None  # EWMA of request latency in seconds
+    requests: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    flood_waits: int = 0
+    cooldown_until: float = 0.0
+
+    @property
+    def cooldown(self) -> float:
+        """Seconds left before this client can be scheduled again."""
+        return max(0.0, self.cooldown_until - time.monotonic())
+
+
+class WorkerPool:
+    """
+    Load-aware scheduler over the main bot and workers that can read
+    the log channel. Picks the healthy client with the lowest expected
+    wait (in-flight requests times latency), and cools down clients
+    after a FloodWait or repeated errors.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._states: Dict[str, ClientState] = {}
+
+    def add(self, client: Client, username: str = "") -> None:
+        """Register a client for streaming."""
+        if client.name not in self._states:
+            self._states[client.name] = ClientState(client=client, username=username)
+
+    def remove(self, client: Client) -> None:
+        """Stop scheduling a client."""
+        self._states.pop(client.name, None)
+
+    def clear(self) -> None:
+        """Remove all clients."""
+        self._states.clear()
+
+    @property
+    def clients(self) -> List[Client]:
+        """All registered clients, in registration order (main bot first)."""
+        return [state.client for state in self._states.values()]
+
+    def states(self) -> List[ClientState]:
+        """Live state of every client, for status reporting."""
+        return list(self._states.values())
+
+    def _expected_wait(self, state: ClientState, default_latency: float) -> float:
+        latency = state.latency if state.latency is not None else default_latency
+        return (state.in_flight + 1) * latency
+
+    def pick(self, exclude: Collection[Client] = ()) -> Optional[Client]:
+        """
+        Pick the least-loaded healthy client.
+        If every candidate is cooling down, the one that recovers first is
+        returned. Returns None if all clients are excluded.
+        """
+        candidates = [s for s in self._states.values() if s.client not in exclude]
+        if not candidates:
+            return None
+
+        healthy = [s for s in candidates if s.cooldown == 0]
+        if not healthy:
+            return min(candidates, key=lambda s: s.cooldown_until).client
+
+        known = [s.latency for s in healthy if s.latency is not None]
+        default_latency = min(known) if known else 1.0
+        return min(healthy, key=lambda s: self._expected_wait(s, default_latency)).client
+
+    @asynccontextmanager
+    async def acquire(self, client: Client) -> AsyncIterator[Client]:
+        """
+        Track one request on a client: waits out any cooldown, then
+        records in-flight count, latency, errors and FloodWait penalties.
+        """
+        state = self._states.get(client.name)
+        if state is None:
+            yield client
+            return
+
+        if state.cooldown:
+            await asyncio.sleep(state.cooldown)
+
+        state.in_flight += 1
+        state.requests += 1
+        started = time.monotonic()
+        try:
+            yield client
+        except FloodWait as e:
+            state.flood_waits += 1
+            state.cooldown_until = time.monotonic() + e.value
+            logger.warning(f"{client.name} hit FloodWait of {e.value}s, cooling down")
+            raise
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            state.errors += 1
+            state.consecutive_errors += 1
+            if state.consecutive_errors >= ERROR_THRESHOLD:
+                state.cooldown_until = time.monotonic() + ERROR_COOLDOWN
+                logger.warning(f"{client.name} failed {state.consecutive_errors} requests in a row, cooling down")
+            raise
+        else:
+            elapsed = time.monotonic() - started
+            if state.latency is None:
+                state.latency = elapsed
+            else:
+                state.latency += self.alpha * (elapsed - state.latency)
+            state.consecutive_errors = 0
+        finally:
+            state.in_flight -= 1
+
+
+# Scheduler for every client that streams from the log channel
+worker_pool = WorkerPool()
 
 # Cached log channel info for workers
 _log_channel_id: Optional[int] = None
@@ -111,12 +242,16 @@ async def cache_log_channel_for_workers():
             except Exception as e3:
                 logger.warning(f"Worker {i + 1} send_message failed: {e3}")
         
-        if not cached:
+        if cached:
+            worker_pool.add(worker, worker_username)
+        else:
             logger.error(f"")
             logger.error(f"❌ Worker {i + 1} (@{worker_username}) FAILED to cache log channel!")
             logger.error(f"   Make sure this bot is an ADMIN in the log channel!")
             logger.error(f"   The bot needs 'Post Messages' and 'Delete Messages' permissions.")
             logger.error(f"")
+    
+    logger.info(f"{len(worker_pool.clients) - 1}/{len(workers)} workers can stream from the log channel")
 
 
 async def stop_workers():
@@ -131,24 +266,15 @@ async def stop_workers():
             logger.error(f"Failed to stop worker {i + 1}: {e}")
     
     workers = []
+    worker_pool.clear()
 
 
 def get_next_worker() -> Client:
     """
-    Get the next worker client in round-robin fashion.
+    Get the least-loaded healthy streaming client.
     Falls back to main bot if no workers available.
     """
-    global current_worker_index
-    
-    if not workers:
-        # Import here to avoid circular import
-        from bot.client import StreamBot
-        return StreamBot
-    
-    worker = workers[current_worker_index]
-    current_worker_index = (current_worker_index + 1) % len(workers)
-    
-    return worker
+    return worker_pool.pick() or get_main_bot()
 
 
 def get_main_bot() -> Client:
@@ -157,6 +283,21 @@ def get_main_bot() -> Client:
     return StreamBot
 
 
+def get_streaming_clients() -> List[Client]:
+    """
+    Get every client that can read the log channel, main bot first.
+    Chunk fetches for a stream are scheduled across these clients.
+    """
+    return worker_pool.clients or [get_main_bot()]
+
+
+def mark_channel_unavailable(worker: Client) -> None:
+    """Stop streaming through a worker that can no longer see the log channel."""
+    if worker in worker_pool.clients:
+        worker_pool.remove(worker)
+        logger.warning(f"{worker.name} cannot access the log channel, removed from streaming")
+
+
 def get_worker_count() -> int:
     """Get the number of active workers."""
     return len(workers)
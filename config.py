@@ -123,7 +123,59 @@ class Config:
     
     # Multi-token workers
     MULTI_TOKENS = _get_multi_tokens()
-    
+
+    # Log channel message cache
+    MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", 1024))
+    MESSAGE_CACHE_TTL = int(os.getenv("MESSAGE_CACHE_TTL", 3600))  # seconds
+
+    # On-disk chunk cache (set CHUNK_CACHE_SIZE=0 to disable)
+    CHUNK_CACHE_DIR = os.getenv("CHUNK_CACHE_DIR", "cache/chunks")
+    CHUNK_CACHE_SIZE = int(os.getenv("CHUNK_CACHE_SIZE", 1073741824))  # 1GB default
+
+    # In-memory cache of whole small files (set SMALL_FILE_CACHE_SIZE=0 to disable)
+    SMALL_FILE_CACHE_ITEM_SIZE = int(os.getenv("SMALL_FILE_CACHE_ITEM_SIZE", 4194304))  # 4MB default
+    SMALL_FILE_CACHE_SIZE = int(os.getenv("SMALL_FILE_CACHE_SIZE", 268435456))  # 256MB default
+
+    # Max chunk fetches kept in flight per stream and client (adapts to latency up to this)
+    STREAM_READ_AHEAD = int(os.getenv("STREAM_READ_AHEAD", 4))
+
+    # Per-chunk fetch timeout and retries (with exponential backoff) before a stream fails
+    STREAM_CHUNK_TIMEOUT = int(os.getenv("STREAM_CHUNK_TIMEOUT", 60))  # seconds
+    STREAM_CHUNK_RETRIES = int(os.getenv("STREAM_CHUNK_RETRIES", 3))
+
+    # Extra chunk requests allowed for hedging slow fetches, as a fraction of all fetches (0 disables)
+    STREAM_HEDGE_BUDGET = float(os.getenv("STREAM_HEDGE_BUDGET", 0.05))
+
+    # Open media sessions to every DC for every streaming bot at startup
+    WARM_MEDIA_SESSIONS = os.getenv("WARM_MEDIA_SESSIONS", "true").lower() == "true"
+
+    # Media connections per streaming bot and DC, and chunk requests each may run at once
+    MEDIA_SESSIONS_PER_DC = max(1, int(os.getenv("MEDIA_SESSIONS_PER_DC", 2)))
+    MEDIA_SESSION_MAX_IN_FLIGHT = int(os.getenv("MEDIA_SESSION_MAX_IN_FLIGHT", 4))
+
+    # Cache-Control max-age for file responses (revoked links may be served by caches until it expires)
+    CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", 3600))
+
+    # Stored files indexed in memory for the streaming routes (revocation, owner and hash)
+    FILE_INDEX_SIZE = int(os.getenv("FILE_INDEX_SIZE", 100000))
+    # Names, sizes and Telegram locations of recently served files
+    FILE_DETAILS_CACHE_SIZE = int(os.getenv("FILE_DETAILS_CACHE_SIZE", 2000))
+
+    # Rendered player page cache
+    PLAYER_CACHE_SIZE = int(os.getenv("PLAYER_CACHE_SIZE", 512))
+    PLAYER_CACHE_TTL = int(os.getenv("PLAYER_CACHE_TTL", 300))  # seconds
+
+    # Requests from the same IP and User-Agent for a file within this many seconds form one session
+    SESSION_MERGE_WINDOW = int(os.getenv("SESSION_MERGE_WINDOW", 60))
+
+    # Stats are written in batches every STATS_FLUSH_INTERVAL seconds (the most lost on a crash),
+    # or sooner once STATS_MAX_PENDING documents have unsaved changes
+    STATS_FLUSH_INTERVAL = int(os.getenv("STATS_FLUSH_INTERVAL", 5))
+    STATS_MAX_PENDING = int(os.getenv("STATS_MAX_PENDING", 1000))
+
+    # Bytes sent by a running stream are saved at most this often (seconds)
+    STATS_CHECKPOINT_INTERVAL = int(os.getenv("STATS_CHECKPOINT_INTERVAL", 30))
+
     # Bot version
     BOT_VERSION = "2.0.0"
 
@@ -0,0 +1,214 @@
+"""
+In-memory index of stored files used by the streaming routes.
+Maps message_id to the fields needed to authorize and verify a request,
+and caches the fields that describe and locate recently served files, so
+requests do not read the files collection or fetch the Telegram message
+until file bytes are actually needed.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+from cachetools import LRUCache
+from config import Config
+from database import get_collection, FILES_COLLECTION
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields kept in memory for every indexed file
+ACCESS_PROJECTION = {
+    "_id": 0,
+    "message_id": 1,
+    "is_revoked": 1,
+    "user_id": 1,
+    "file_hash": 1
+}
+
+# Fields loaded on demand for files being served
+DETAILS_PROJECTION = {
+    "_id": 0,
+    "message_id": 1,
+    "file_name": 1,
+    "file_size": 1,
+    "mime_type": 1,
+    "file_unique_id": 1,
+    "file_location": 1,
+    "uploaded_at": 1
+}
+
+# Records read per round trip while warming
+WARM_BATCH_SIZE = 1000
+
+# Marks message IDs known to have no file record
+_NO_RECORD = object()
+
+
+class FileAccess(NamedTuple):
+    """Fields of a file record needed to authorize a request."""
+    revoked: bool
+    user_id: int
+    # Short link hashes are derived from it (see utils.hashing)
+    file_hash: str
+
+
+class FileDetails(NamedTuple):
+    """Fields of a file record needed to describe and fetch the file."""
+    file_name: str
+    file_size: int
+    mime_type: str
+    file_unique_id: str
+    # Decoded file ID fields of the main bot (see utils.file_properties)
+    location: Optional[Dict[str, Any]]
+    uploaded_at: Optional[datetime]
+
+
+class FileIndex:
+    """
+    Bounded LRU index of file records by message_id.
+    Revocation, ownership and hashes of up to `maxsize` files are kept
+    resident; names, sizes and locations only for the `details_size` files
+    most recently served. Kept current by create_file, revoke_file and
+    revoke_user_files; evicted entries are read back on the next request.
+    """
+
+    def __init__(self, maxsize: int, details_size: int):
+        self._entries = LRUCache(maxsize=maxsize)
+        self._details = LRUCache(maxsize=details_size)
+        # Bumped on every revocation
+        self._revocations = 0
+        self.hits = 0
+        self.misses = 0
+        self.details_hits = 0
+        self.details_misses = 0
+
+    @staticmethod
+    def _access(file: dict) -> FileAccess:
+        return FileAccess(
+            revoked=file.get("is_revoked", False),
+            user_id=file.get("user_id", 0),
+            file_hash=file.get("file_hash", "")
+        )
+
+    @staticmethod
+    def _details_of(file: dict) -> FileDetails:
+        return FileDetails(
+            file_name=file.get("file_name", ""),
+            file_size=file.get("file_size", 0),
+            mime_type=file.get("mime_type", ""),
+            file_unique_id=file.get("file_unique_id", ""),
+            location=file.get("file_location"),
+            uploaded_at=file.get("uploaded_at")
+        )
+
+    async def warm(self) -> None:
+        """Load access fields of the most recently uploaded files."""
+        collection = get_collection(FILES_COLLECTION)
+        cursor = (
+            collection.find({}, ACCESS_PROJECTION)
+            .sort("uploaded_at", -1)
+            .limit(self._entries.maxsize)
+            .batch_size(WARM_BATCH_SIZE)
+        )
+
+        loaded = []
+        async for file in cursor:
+            loaded.append((file["message_id"], self._access(file)))
+
+        # Oldest first, so the newest files are the last to be evicted
+        for message_id, entry in reversed(loaded):
+            self._entries[message_id] = entry
+
+        logger.info(f"File index warmed with {len(loaded)} files")
+
+    async def get(self, message_id: int) -> Optional[FileAccess]:
+        """Get the access fields of a file, or None if there is no record."""
+        entry = self._entries.get(message_id)
+        if entry is not None:
+            self.hits += 1
+            return None if entry is _NO_RECORD else entry
+
+        self.misses += 1
+        revocations = self._revocations
+        collection = get_collection(FILES_COLLECTION)
+        file = await collection.find_one(
+            {"message_id": message_id},
+            {**ACCESS_PROJECTION, **DETAILS_PROJECTION}
+        )
+
+        entry = self._access(file) if file else _NO_RECORD
+        # A revocation during the read may have been missed; read it again next time
+        if revocations == self._revocations:
+            self._entries[message_id] = entry
+        if file:
+            # The file is about to be served, so keep its details too
+            self._details[message_id] = self._details_of(file)
+        return None if entry is _NO_RECORD else entry
+
+    async def get_details(self, message_id: int) -> Optional[FileDetails]:
+        """Get the name, size and location of a file, or None if there is no record."""
+        details = self._details.get(message_id)
+        if details is not None:
+            self.details_hits += 1
+            return details
+
+        self.details_misses += 1
+        # Files without a record are remembered by the access index
+        if await self.get(message_id) is None:
+            return None
+        # Read along with the access fields if those were missing too
+        details = self._details.get(message_id)
+        if details is not None:
+            return details
+
+        collection = get_collection(FILES_COLLECTION)
+        file = await collection.find_one({"message_id": message_id}, DETAILS_PROJECTION)
+        if not file:
+            return None
+
+        details = self._details_of(file)
+        self._details[message_id] = details
+        return details
+
+    def add(self, file: dict) -> None:
+        """Index a new file record."""
+        self._entries[file["message_id"]] = self._access(file)
+        self._details[file["message_id"]] = self._details_of(file)
+
+    def set_file_reference(self, message_id: int, file_reference: bytes) -> None:
+        """Update the stored file reference of a cached file."""
+        details = self._details.get(message_id)
+        if details is not None and details.location:
+            self._details[message_id] = details._replace(
+                location={**details.location, "file_reference": file_reference}
+            )
+
+    def revoke(self, message_id: int) -> None:
+        """Mark a file as revoked."""
+        self._revocations += 1
+        entry = self._entries.get(message_id)
+        if entry is not None and entry is not _NO_RECORD:
+            self._entries[message_id] = entry._replace(revoked=True)
+
+    def revoke_user(self, user_id: int) -> None:
+        """Mark all indexed files of a user as revoked."""
+        self._revocations += 1
+        for message_id, entry in list(self._entries.items()):
+            if entry is not _NO_RECORD and entry.user_id == user_id:
+                self._entries[message_id] = entry._replace(revoked=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Get index counters."""
+        return {
+            "size": len(self._entries),
+            "max_size": self._entries.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "details_size": len(self._details),
+            "details_max_size": self._details.maxsize,
+            "details_hits": self.details_hits,
+            "details_misses": self.details_misses
+        }
+
+
+# Shared index used by the streaming routes
+file_index = FileIndex(Config.FILE_INDEX_SIZE, Config.FILE_DETAILS_CACHE_SIZE)
@@ -5,6 +5,7 @@ File database operations.
 from datetime import datetime
 from typing import Optional, List, Tuple
 from database import get_collection, FILES_COLLECTION
+from database.file_index import file_index
 
 
 async def create_file(file_data: dict) -> dict:
@@ -18,6 +19,7 @@ async def create_file(file_data: dict) -> dict:
     
     result = await collection.insert_one(file_data)
     file_data["_id"] = result.inserted_id
+    file_index.add(file_data)
     return file_data
 
 
@@ -119,6 +121,7 @@ async def revoke_file(message_id: int) -> None:
             }
         }
     )
+    file_index.revoke(message_id)
 
 
 async def revoke_user_files(user_id: int) -> int:
@@ -134,31 +137,20 @@ async def revoke_user_files(user_id: int) -> int:
             }
         }
     )
+    file_index.revoke_user(user_id)
     
     return result.modified_count
 
 
-async def is_file_revoked(message_id: int) -> bool:
-    """Check if a file is revoked."""
-    file = await get_file_by_message_id(message_id)
-    if file:
-        return file.get("is_revoked", False)
-    return False
-
-
-async def update_file_access(message_id: int, bytes_sent: int) -> None:
-    """Update file access statistics."""
+async def update_file_reference(message_id: int, file_reference: bytes) -> None:
+    """Store a refreshed Telegram file reference for a file."""
     collection = get_collection(FILES_COLLECTION)
     
     await collection.update_one(
-        {"message_id": message_id},
-        {
-            "$inc": {
-                "access_count": 1,
-                "bandwidth": bytes_sent
-            }
-        }
+        {"message_id": message_id, "file_location": {"$exists": True}},
+        {"$set": {"file_location.file_reference": file_reference}}
     )
+    file_index.set_file_reference(message_id, file_reference)
 
 
 async def get_user_bandwidth(user_id: int) -> int:
@@ -0,0 +1,236 @@
+"""
+Write-behind buffer for streaming statistics.
+Session, file access and bandwidth updates are accumulated in memory and
+written with one bulk_write per collection every STATS_FLUSH_INTERVAL
+seconds, so at most that much is lost if the process dies.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from config import Config
+from database import get_collection, SESSIONS_COLLECTION, FILES_COLLECTION, USERS_COLLECTION
+from database.sessions import new_session_document
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StatsBuffer:
+    """
+    In-memory accumulator of stats writes.
+    Updates to the same document are merged before they are flushed.
+    """
+
+    def __init__(self, interval: int, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        # session_id -> session document not inserted yet
+        self._new_sessions: Dict[str, dict] = {}
+        # session_id -> {"bytes_sent", "last_active_at", "is_active"}
+        self._session_updates: Dict[str, dict] = {}
+        # message_id -> [access_count, bandwidth]
+        self._file_access: Dict[int, List[int]] = {}
+        # user_id -> bandwidth_used
+        self._user_bandwidth: Dict[int, int] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.failures = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of documents with unflushed changes."""
+        return (
+            len(self._new_sessions) + len(self._session_updates) +
+            len(self._file_access) + len(self._user_bandwidth)
+        )
+
+    def _changed(self) -> None:
+        # Flush early instead of growing without bound under heavy load
+        if self.pending >= self.max_pending:
+            self._wakeup.set()
+
+    def create_session(
+        self,
+        session_id: str,
+        message_id: int,
+        user_id: int,
+        ip_address: str,
+        user_agent: str
+    ) -> dict:
+        """Record a new streaming session."""
+        session_data = new_session_document(session_id, message_id, user_id, ip_address, user_agent)
+        self._new_sessions[session_id] = session_data
+        self._changed()
+        return session_data
+
+    def update_session(self, session_id: str, bytes_sent: int) -> None:
+        """Add bytes sent to a session."""
+        now = datetime.utcnow()
+        session_data = self._new_sessions.get(session_id)
+        if session_data is not None:
+            session_data["bytes_sent"] += bytes_sent
+            session_data["last_active_at"] = now
+            return
+
+        update = self._session_updates.setdefault(session_id, {"bytes_sent": 0, "is_active": None})
+        update["bytes_sent"] += bytes_sent
+        update["last_active_at"] = now
+        self._changed()
+
+    def end_session(self, session_id: str) -> None:
+        """Mark a session as ended."""
+        now = datetime.utcnow()
+        session_data = self._new_sessions.get(session_id)
+        if session_data is not None:
+            session_data["is_active"] = False
+            session_data["last_active_at"] = now
+            return
+
+        update = self._session_updates.setdefault(session_id, {"bytes_sent": 0, "is_active": None})
+        update["is_active"] = False
+        update["last_active_at"] = now
+        self._changed()
+
+    def update_file_access(self, message_id: int, bytes_sent: int, accesses: int = 1) -> None:
+        """Count accesses to a file and the bytes sent."""
+        access = self._file_access.setdefault(message_id, [0, 0])
+        access[0] += accesses
+        access[1] += bytes_sent
+        self._changed()
+
+    def update_user_bandwidth(self, user_id: int, bytes_used: int) -> None:
+        """Add to a user's bandwidth usage."""
+        self._user_bandwidth[user_id] = self._user_bandwidth.get(user_id, 0) + bytes_used
+        self._changed()
+
+    async def flush(self) -> None:
+        """Write all buffered changes to the database."""
+        async with self._flush_lock:
+            new_sessions, self._new_sessions = self._new_sessions, {}
+            session_updates, self._session_updates = self._session_updates, {}
+            file_access, self._file_access = self._file_access, {}
+            user_bandwidth, self._user_bandwidth = self._user_bandwidth, {}
+
+            # Inserts go first so later updates find their session
+            session_ops = [InsertOne(doc) for doc in new_sessions.values()]
+            for session_id, update in session_updates.items():
+                change = {"$set": {"last_active_at": update["last_active_at"]}}
+                if update["bytes_sent"]:
+                    change["$inc"] = {"bytes_sent": update["bytes_sent"]}
+                if update["is_active"] is not None:
+                    change["$set"]["is_active"] = update["is_active"]
+                session_ops.append(UpdateOne({"session_id": session_id}, change))
+
+            file_ops = [
+                UpdateOne(
+                    {"message_id": message_id},
+                    {"$inc": {"access_count": count, "bandwidth": bandwidth}}
+                )
+                for message_id, (count, bandwidth) in file_access.items()
+            ]
+
+            user_ops = [
+                UpdateOne({"user_id": user_id}, {"$inc": {"bandwidth_used": used}})
+                for user_id, used in user_bandwidth.items()
+            ]
+
+            if not await self._write(SESSIONS_COLLECTION, session_ops, ordered=True):
+                self._restore_sessions(new_sessions, session_updates)
+            if not await self._write(FILES_COLLECTION, file_ops):
+                for message_id, (count, bandwidth) in file_access.items():
+                    access = self._file_access.setdefault(message_id, [0, 0])
+                    access[0] += count
+                    access[1] += bandwidth
+            if not await self._write(USERS_COLLECTION, user_ops):
+                for user_id, used in user_bandwidth.items():
+                    self._user_bandwidth[user_id] = self._user_bandwidth.get(user_id, 0) + used
+
+            self.flushes += 1
+
+    async def _write(self, collection_name: str, ops: list, ordered: bool = False) -> bool:
+        """
+        Run a bulk write. Returns False if the database could not be reached
+        and the changes should be retried on the next flush.
+        """
+        if not ops:
+            return True
+
+        try:
+            await get_collection(collection_name).bulk_write(ops, ordered=ordered)
+        except BulkWriteError as e:
+            # Some operations were applied; retrying would count them twice
+            self.failures += 1
+            logger.warning(f"Stats flush to {collection_name} partly failed: {e.details.get('writeErrors', [])[:1]}")
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Stats flush to {collection_name} failed, will retry: {e}")
+            return False
+        return True
+
+    def _restore_sessions(self, new_sessions: Dict[str, dict], session_updates: Dict[str, dict]) -> None:
+        """Put session changes from a failed flush back in front of newer ones."""
+        for session_id, session_data in new_sessions.items():
+            update = self._session_updates.pop(session_id, None)
+            if update:
+                session_data["bytes_sent"] += update["bytes_sent"]
+                session_data["last_active_at"] = update["last_active_at"]
+                if update["is_active"] is not None:
+                    session_data["is_active"] = update["is_active"]
+            self._new_sessions[session_id] = session_data
+
+        for session_id, update in session_updates.items():
+            newer = self._session_updates.get(session_id)
+            if newer:
+                update["bytes_sent"] += newer["bytes_sent"]
+                update["last_active_at"] = newer["last_active_at"]
+                if newer["is_active"] is not None:
+                    update["is_active"] = newer["is_active"]
+            self._session_updates[session_id] = update
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Stats flush error: {e}")
+
+    def start(self) -> None:
+        """Start flushing periodically."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        logger.info("Stats buffer flushed")
+
+    def stats(self) -> Dict[str, int]:
+        """Get buffer counters."""
+        return {
+            "pending": self.pending,
+            "flushes": self.flushes,
+            "failures": self.failures
+        }
+
+
+# Shared stats buffer used by the download handler
+stats_buffer = StatsBuffer(Config.STATS_FLUSH_INTERVAL, Config.STATS_MAX_PENDING)
@@ -88,16 +88,6 @@ async def update_user_stats(user_id: int) -> None:
     )
 
 
-async def update_user_bandwidth(user_id: int, bytes_used: int) -> None:
-    """Update user bandwidth usage."""
-    collection = get_collection(USERS_COLLECTION)
-    
-    await collection.update_one(
-        {"user_id": user_id},
-        {"$inc": {"bandwidth_used": bytes_used}}
-    )
-
-
 async def get_all_users() -> List[dict]:
     """Get all non-blocked users (for broadcast)."""
     collection = get_collection(USERS_COLLECTION)
@@ -11,12 +11,22 @@ from config import Config
 from database.users import get_user_count, get_active_user_count
 from database.files import get_total_file_count, get_total_bandwidth, get_total_stream_count
 from database.bans import get_ban_count
-from database.sessions import get_active_sessions, get_active_session_count
-from bot.workers import get_worker_count
+from database.file_index import file_index
+from bot.workers import get_worker_count, worker_pool
+from bot.streamer import chunk_fetches, chunk_hedging, media_warmup, get_media_pool_stats
 from utils.helpers import is_admin, format_bytes, format_duration, mask_ip
+from utils.message_cache import message_cache
+from utils.chunk_cache import chunk_cache
+from utils.file_cache import small_file_cache
+from utils.live_sessions import live_sessions
+from utils.page_cache import page_cache
 
 start_time = datetime.utcnow()
 
+# Telegram rejects messages over 4096 characters (MESSAGE_TOO_LONG), and counts
+# some emoji as two; replies listing many items stop short of that
+MAX_MESSAGE_LENGTH = 4000
+
 
 @Client.on_message(filters.command("admin") & filters.private)
 async def admin_command(client: Client, message: Message):
@@ -72,7 +82,7 @@ async def stats_command(client: Client, message: Message):
     total_files = await get_total_file_count()
     total_bandwidth = await get_total_bandwidth()
     total_streams = await get_total_stream_count()
-    active_sessions = await get_active_session_count()
+    active_sessions = len(live_sessions)
     banned_users = await get_ban_count()
     
     # System resources
@@ -81,6 +91,13 @@ async def stats_command(client: Client, message: Message):
     
     uptime = datetime.utcnow() - start_time
     worker_count = get_worker_count()
+    msg_cache = message_cache.stats()
+    disk_cache = chunk_cache.stats()
+    fetches = chunk_fetches.stats()
+    hedging = chunk_hedging.stats()
+    memory_cache = small_file_cache.stats()
+    pages = page_cache.stats()
+    index = file_index.stats()
     
     stats_text = f"""📊 Bot Statistics
 
@@ -100,6 +117,24 @@ async def stats_command(client: Client, message: Message):
 🤖 Workers:
 • Configured: {worker_count}
 
+🗂 Message Cache:
+• Cached: {msg_cache['size']}
+• Hits / Misses: {msg_cache['hits']} / {msg_cache['misses']}
+• Refreshes: {msg_cache['refreshes']}
+• Player pages: {pages['size']} cached, {pages['hits']} / {pages['misses']} hits / misses
+• File index: {index['size']} / {index['max_size']} records, {index['hits']} / {index['misses']} hits / misses
+• File details: {index['details_size']} / {index['details_max_size']} records, {index['details_hits']} / {index['details_misses']} hits / misses
+
+💾 Chunk Cache:
+• Stored: {disk_cache['chunks']} chunks ({format_bytes(disk_cache['size'])} / {format_bytes(disk_cache['max_size'])})
+• Hits / Misses: {disk_cache['hits']} / {disk_cache['misses']}
+• Shared fetches: {fetches['shared']} (of {fetches['calls'] + fetches['shared']} requests)
+• Hedged fetches: {hedging['hedges']} of {hedging['fetches']} ({hedging['wins']} won, after {hedging['deadline'] * 1000:.0f} ms)
+
+🧠 Small File Cache:
+• Stored: {memory_cache['files']} files ({format_bytes(memory_cache['size'])} / {format_bytes(memory_cache['max_size'])})
+• Hits / Misses: {memory_cache['hits']} / {memory_cache['misses']}
+
 💻 System:
 • Uptime: {format_duration(uptime)}
 • Memory: {memory_mb:.2f} MB
@@ -131,10 +166,47 @@ async def workers_command(client: Client, message: Message):
         text += "...\n\n"
         text += "Then restart the bot."
     else:
-        text += "Workers loaded from fsb.env:\n\n"
-        for i in range(worker_count):
-            text += f"• Worker #{i + 1}: ✅ Configured\n"
-        text += "\nWorkers are automatically used for file streaming."
+        streaming_workers = max(len(worker_pool.clients) - 1, 0)
+        text += f"{streaming_workers}/{worker_count} workers can read the log channel.\n"
+    
+    text += "\n📡 Live Streaming Clients:\n\n"
+    states = worker_pool.states()
+    for i, state in enumerate(states):
+        if state.cooldown:
+            status = f"⏸ Cooling down ({state.cooldown:.0f}s)"
+        elif state.consecutive_errors:
+            status = f"⚠️ Degraded ({state.consecutive_errors} recent errors)"
+        else:
+            status = "✅ Healthy"
+        latency = f"{state.latency * 1000:.0f} ms" if state.latency is not None else "n/a"
+        
+        entry = f"• {state.client.name} (@{state.username or 'unknown'}): {status}\n"
+        entry += f"   In-flight: {state.in_flight} | Latency: {latency}\n"
+        entry += f"   Requests: {state.requests} | Errors: {state.errors} | FloodWaits: {state.flood_waits}\n"
+        
+        # One line for all DCs: warm-up result, then connections, in-flight and waited/total requests
+        warmup = media_warmup.get(state.client.name, {})
+        pools = get_media_pool_stats(state.client)
+        dcs = []
+        for dc_id in sorted(set(warmup) | set(pools)):
+            details = []
+            if dc_id in warmup:
+                seconds = warmup[dc_id]
+                details.append("warm-up failed" if seconds is None else f"{seconds * 1000:.0f} ms")
+            if dc_id in pools:
+                pool = pools[dc_id]
+                details.append(f"{pool['sessions']} conn, {pool['in_flight']} busy, {pool['waits']}/{pool['requests']} waited")
+            dcs.append(f"{dc_id} ({', '.join(details)})")
+        if dcs:
+            entry += "   Media DCs: " + "; ".join(dcs) + "\n"
+        
+        # Leave room to say how many clients were left out
+        more = f"... and {len(states) - i} more clients\n"
+        reserve = len(more) if i < len(states) - 1 else 0
+        if len(text) + len(entry) + reserve > MAX_MESSAGE_LENGTH:
+            text += more
+            break
+        text += entry
     
     await message.reply_text(text)
 
@@ -148,7 +220,7 @@ async def processes_command(client: Client, message: Message):
         await message.reply_text("❌ You are not authorized to use admin commands.")
         return
     
-    sessions = await get_active_sessions()
+    sessions = live_sessions.sessions()
     
     if not sessions:
         await message.reply_text("📡 Active Streaming Sessions\n\nNo active streaming sessions at the moment.")
@@ -7,6 +7,7 @@ from pyrogram.types import Message
 from database.bans import ban_user, unban_user, is_user_banned, get_banned_users
 from database.files import revoke_user_files
 from utils.helpers import is_admin, parse_duration, format_duration
+from utils.page_cache import page_cache
 
 
 @Client.on_message(filters.command("ban") & filters.private)
@@ -59,6 +60,9 @@ async def ban_command(client: Client, message: Message):
     
     # Revoke all links
     revoked_count = await revoke_user_files(target_user_id)
+    if revoked_count:
+        # Cached pages are not indexed by owner
+        page_cache.clear()
     
     duration_text = format_duration(duration) if duration else "Permanent"
     
@@ -10,6 +10,8 @@ from database.files import get_user_active_files, get_file_by_message_id, revoke
 from plugins.forcesub import check_force_subscription, check_force_sub_callback
 from utils.helpers import contains, format_bytes, truncate_string
 from utils.logger import logger
+from utils.message_cache import message_cache
+from utils.page_cache import page_cache
 
 FILES_PER_PAGE = 10
 MAX_FILES_TO_SHOW = 40
@@ -248,6 +250,8 @@ async def confirm_delete_callback(client: Client, callback_query: CallbackQuery)
     
     try:
         await revoke_file(message_id)
+        page_cache.invalidate(message_id)
+        message_cache.invalidate(message_id)
         await callback_query.answer("✅ File deleted successfully!")
         
         # Go back to files list
@@ -6,6 +6,8 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 from database.files import get_file_by_message_id, revoke_file
 from utils.helpers import is_admin
+from utils.message_cache import message_cache
+from utils.page_cache import page_cache
 
 
 @Client.on_message(filters.command("revokelink") & filters.private)
@@ -48,6 +50,8 @@ async def revokelink_command(client: Client, message: Message):
     
     # Revoke the file
     await revoke_file(message_id)
+    page_cache.invalidate(message_id)
+    message_cache.invalidate(message_id)
     
     await message.reply_text(
         f"✅ **Link Revoked Successfully**\n\n"
@@ -11,7 +11,7 @@ from database.files import create_file, get_user_monthly_file_count
 from plugins.forcesub import check_force_subscription
 from utils.helpers import contains
 from utils.hashing import pack_file, get_short_hash
-from utils.file_properties import get_file_properties, is_supported_media
+from utils.file_properties import get_file_properties, get_file_location, is_supported_media
 from utils.logger import logger
 
 
@@ -84,7 +84,10 @@ async def handle_file(client: Client, message: Message):
             "mime_type": props["mime_type"],
             "file_hash": full_hash,
             "short_hash": short_hash,
-            "stream_link": stream_link
+            "stream_link": stream_link,
+            "file_unique_id": props["file_unique_id"],
+            # Lets the streamer download the file without fetching the message
+            "file_location": get_file_location(forwarded)
         }
         
         await create_file(file_data)
@@ -0,0 +1,271 @@
+"""
+Build self-hosted player page assets.
+
+Vendors the Inter web font (Google Fonts) and Font Awesome (cdnjs), keeps
+only the font subsets and icons the player uses, minifies the player's
+inline CSS/JS and writes everything to web/static/dist with content-hashed
+file names, precompressed copies and a manifest.json.
+
+The web server uses the build when the manifest exists and falls back to
+the inline template and CDN links otherwise. If fontTools (and brotli) are
+installed, the icon fonts are also cut down to the glyphs in use.
+
+Usage:
+    python scripts/build_assets.py [--font-subsets latin,latin-ext]
+"""
+
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+import requests
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TEMPLATE_PATH = os.path.join(ROOT, "web", "templates", "player.html")
+DIST_DIR = os.path.join(ROOT, "web", "static", "dist")
+
+INTER_CSS_URL = "https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap"
+FONT_AWESOME_CSS_URL = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css"
+
+# Google Fonts only serves woff2 to browsers it recognises
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Font Awesome faces used by the player (fas and fab)
+FONT_AWESOME_FILES = ("fa-solid-900", "fa-brands-400")
+
+ICON_RULE = re.compile(r"^\.fa-([a-z0-9-]+):{1,2}(?:before|after)$")
+
+
+def fetch(url: str) -> bytes:
+    """Download a file."""
+    response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def write_hashed(stem: str, ext: str, data: bytes, compress: bool = False) -> str:
+    """Write data as <stem>.<hash>.<ext> (plus .gz/.br copies) and return the file name."""
+    name = f"{stem}.{content_hash(data)}.{ext}"
+    path = os.path.join(DIST_DIR, name)
+    with open(path, "wb") as f:
+        f.write(data)
+
+    if compress:
+        with open(f"{path}.gz", "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9))
+        if brotli:
+            with open(f"{path}.br", "wb") as f:
+                f.write(brotli.compress(data, quality=11))
+
+    return name
+
+
+def extract_block(html: str, tag: str) -> str:
+    """Get the contents of the first inline <style> or <script> block."""
+    match = re.search(rf"<{tag}>(.*?)</{tag}>", html, re.S)
+    if not match:
+        raise ValueError(f"No inline <{tag}> block in {TEMPLATE_PATH}")
+    return match.group(1)
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and whitespace from CSS."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # Spaces before ":" can be significant in selectors (".a :hover")
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(js: str) -> str:
+    """
+    Conservatively minify JS: drop indentation, blank lines and whole-line
+    comments. Statements are left alone so strings and ASI are untouched.
+    """
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def split_rules(css: str):
+    """Split a stylesheet into top-level (prelude, block) pairs."""
+    rules = []
+    depth = 0
+    start = 0
+    prelude = ""
+    for i, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude = css[start:i].strip()
+                start = i + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:i]))
+                start = i + 1
+    return rules
+
+
+def vendor_inter(subsets: set) -> str:
+    """Download the Inter font faces for the wanted subsets and return their CSS."""
+    css = fetch(INTER_CSS_URL).decode("utf-8")
+    downloaded = {}
+    faces = []
+
+    # Each @font-face is preceded by a /* subset */ comment
+    for subset_name, face in re.findall(r"/\*\s*([a-z-]+)\s*\*/\s*(@font-face\s*\{.*?\})", css, re.S):
+        if subset_name not in subsets:
+            continue
+
+        url = re.search(r"url\((https://[^)]+\.woff2)\)", face).group(1)
+        if url not in downloaded:
+            downloaded[url] = write_hashed(f"inter-{subset_name}", "woff2", fetch(url))
+        faces.append(face.replace(url, downloaded[url]))
+
+    if not faces:
+        raise ValueError(f"No Inter faces found for subsets {sorted(subsets)}")
+
+    return minify_css("\n".join(faces))
+
+
+def vendor_font_awesome(used_icons: set) -> str:
+    """Download Font Awesome and return CSS with only the icons in use."""
+    css = fetch(FONT_AWESOME_CSS_URL).decode("utf-8")
+    base_url = FONT_AWESOME_CSS_URL.rsplit("/css/", 1)[0]
+    kept = []
+    codepoints = set()
+
+    for prelude, block in split_rules(css):
+        if prelude.startswith("@font-face"):
+            font = next((name for name in FONT_AWESOME_FILES if f"{name}.woff2" in block), None)
+            # v4/v5 compatibility faces are not needed
+            if font is None or '"FontAwesome"' in block:
+                continue
+            kept.append((prelude, block, font))
+            continue
+
+        selectors = [s.strip() for s in prelude.split(",")]
+        names = [ICON_RULE.match(s) for s in selectors]
+        if all(names):
+            if not any(match.group(1) in used_icons for match in names):
+                continue
+            codepoints.update(int(cp, 16) for cp in re.findall(r'content:\s*"\\([0-9a-f]+)"', block))
+        kept.append((prelude, block, None))
+
+    output = []
+    font_files = {}
+    for prelude, block, font in kept:
+        if font:
+            # Compatibility aliases point several faces at the same file
+            if font not in font_files:
+                data = subset_font(fetch(f"{base_url}/webfonts/{font}.woff2"), codepoints)
+                font_files[font] = write_hashed(font, "woff2", data)
+            file_name = font_files[font]
+            block = re.sub(r"src:[^;}]+", f'src:url({file_name}) format("woff2")', block)
+        output.append(f"{prelude}{{{block}}}")
+
+    return "".join(output)
+
+
+def subset_font(data: bytes, codepoints: set) -> bytes:
+    """Keep only the given glyphs of a woff2 font, if fontTools is installed."""
+    if font_subset is None or brotli is None or not codepoints:
+        return data
+
+    options = font_subset.Options()
+    options.flavor = "woff2"
+    font = font_subset.load_font(io.BytesIO(data), options)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+
+    output = io.BytesIO()
+    font_subset.save_font(font, output, options)
+    return output.getvalue()
+
+
+def build(subsets: set) -> dict:
+    """Build the assets and return the manifest."""
+    with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    used_icons = set(re.findall(r"\bfa-([a-z0-9-]+)", html))
+
+    # Start from a clean directory so stale hashed files do not pile up
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+
+    inter_css = vendor_inter(subsets)
+    icons_css = vendor_font_awesome(used_icons)
+    player_css = minify_css(extract_block(html, "style"))
+
+    css = "\n".join([inter_css, icons_css, player_css]).encode("utf-8")
+    js = minify_js(extract_block(html, "script")).encode("utf-8")
+
+    fonts = sorted(name for name in os.listdir(DIST_DIR) if name.endswith(".woff2"))
+    manifest = {
+        "player.css": write_hashed("player", "css", css, compress=True),
+        "player.js": write_hashed("player", "js", js, compress=True),
+        # Fonts the first paint needs
+        "preload": [name for name in fonts if name.startswith(("inter-latin.", "fa-solid-900."))]
+    }
+
+    with open(os.path.join(DIST_DIR, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--font-subsets",
+        default="latin,latin-ext",
+        help="comma-separated Inter unicode subsets to vendor (others use the system font)"
+    )
+    args = parser.parse_args()
+
+    try:
+        manifest = build({s.strip() for s in args.font_subsets.split(",") if s.strip()})
+    except Exception as e:
+        # Without a complete build the player keeps using the inline template and CDNs
+        shutil.rmtree(DIST_DIR, ignore_errors=True)
+        print(f"Asset build failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for name in os.listdir(DIST_DIR):
+        size = os.path.getsize(os.path.join(DIST_DIR, name))
+        print(f"{name:48} {size / 1024:8.1f} KB")
+    print(f"Manifest: {json.dumps(manifest)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Disk-backed cache of streamed file chunks.
+Chunks are stored as <directory>/<file_unique_id>/<chunk_index>.chunk
+and evicted least-recently-used once the size cap is reached.
+"""
+
+import os
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import aiofiles
+import aiofiles.os
+from config import Config
+from utils.logger import logger
+
+
+class ChunkCache:
+    """LRU store of fixed-size file chunks on local disk."""
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.current_size = 0
+        self.hits = 0
+        self.misses = 0
+        # (file_unique_id, chunk_index) -> chunk size, oldest first
+        self._index: "OrderedDict[Tuple[str, int], int]" = OrderedDict()
+        self._pending = set()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the disk cache is enabled."""
+        return self.max_size > 0
+
+    def _path(self, file_unique_id: str, index: int) -> str:
+        return os.path.join(self.directory, file_unique_id, f"{index}.chunk")
+
+    def _scan(self) -> None:
+        """Rebuild the in-memory index from chunks already on disk."""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for file_dir in os.scandir(self.directory):
+            if not file_dir.is_dir():
+                continue
+            for entry in os.scandir(file_dir.path):
+                name, ext = os.path.splitext(entry.name)
+                if ext != ".chunk" or not name.isdigit():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_atime, file_dir.name, int(name), stat.st_size))
+
+        # Least recently accessed chunks go first
+        for _, file_unique_id, index, size in sorted(entries):
+            self._index[(file_unique_id, index)] = size
+            self.current_size += size
+
+    async def load(self) -> None:
+        """Load the cache index from disk."""
+        if not self.enabled:
+            return
+
+        await asyncio.get_running_loop().run_in_executor(None, self._scan)
+        logger.info(
+            f"Chunk cache loaded: {len(self._index)} chunks, "
+            f"{self.current_size // (1024 * 1024)} MB in {self.directory}"
+        )
+        await self._evict()
+
+    async def read(self, file_unique_id: str, index: int, offset: int, length: int) -> Optional[bytes]:
+        """Read length bytes starting at offset within a cached chunk."""
+        key = (file_unique_id, index)
+        if key not in self._index:
+            self.misses += 1
+            return None
+
+        try:
+            async with aiofiles.open(self._path(file_unique_id, index), "rb") as f:
+                await f.seek(offset)
+                data = await f.read(length)
+        except OSError as e:
+            logger.warning(f"Dropping unreadable cached chunk {file_unique_id}/{index}: {e}")
+            self._forget(key)
+            self.misses += 1
+            return None
+
+        # The chunk may have been evicted while it was being read
+        if key in self._index:
+            self._index.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def store(self, file_unique_id: str, index: int, data: bytes) -> None:
+        """Write a chunk to disk in the background."""
+        key = (file_unique_id, index)
+        if not self.enabled or key in self._index or key in self._pending:
+            return
+
+        self._pending.add(key)
+        task = asyncio.create_task(self._write(key, data))
+        task.add_done_callback(lambda _: self._pending.discard(key))
+
+    async def _write(self, key: Tuple[str, int], data: bytes) -> None:
+        file_unique_id, index = key
+        path = self._path(file_unique_id, index)
+        tmp_path = f"{path}.tmp"
+
+        try:
+            await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(data)
+            await aiofiles.os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache chunk {file_unique_id}/{index}: {e}")
+            return
+
+        self._index[key] = len(data)
+        self.current_size += len(data)
+        await self._evict()
+
+    def _forget(self, key: Tuple[str, int]) -> None:
+        size = self._index.pop(key, None)
+        if size is not None:
+            self.current_size -= size
+
+    async def _evict(self) -> None:
+        """Remove least recently used chunks until under the size cap."""
+        while self.current_size > self.max_size and self._index:
+            key, _ = next(iter(self._index.items()))
+            self._forget(key)
+            try:
+                await aiofiles.os.remove(self._path(*key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "chunks": len(self._index),
+            "size": self.current_size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Shared on-disk chunk cache
+chunk_cache = ChunkCache(Config.CHUNK_CACHE_DIR, Config.CHUNK_CACHE_SIZE)
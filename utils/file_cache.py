@@ -0,0 +1,84 @@
+"""
+In-memory cache of whole small files (photos, voice notes, stickers, short
+animations), so they are served without going back to Telegram.
+"""
+
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+from config import Config
+from utils.singleflight import SingleFlight
+
+
+class SmallFileCache:
+    """
+    LRU of whole files keyed by a stable file key (the stored file hash, or
+    file_unique_id for files without a record).
+    Only files up to max_item_size bytes are kept, and the least recently
+    used ones are dropped once the total exceeds max_size bytes.
+    """
+
+    def __init__(self, max_item_size: int, max_size: int):
+        self.max_item_size = max_item_size
+        self.max_size = max_size
+        self.current_size = 0
+        self.hits = 0
+        self.misses = 0
+        self._files: "OrderedDict[str, bytes]" = OrderedDict()
+        self._loads = SingleFlight()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the memory cache is enabled."""
+        return self.max_size > 0 and self.max_item_size > 0
+
+    def fits(self, file_size: int) -> bool:
+        """Check if a file is small enough to be cached."""
+        return self.enabled and 0 < file_size <= min(self.max_item_size, self.max_size)
+
+    def get(self, file_unique_id: str) -> Optional[bytes]:
+        """Get a cached file."""
+        data = self._files.get(file_unique_id)
+        if data is not None:
+            self._files.move_to_end(file_unique_id)
+        return data
+
+    def put(self, file_unique_id: str, data: bytes) -> None:
+        """Cache a file, evicting the least recently used ones if needed."""
+        if not self.fits(len(data)) or file_unique_id in self._files:
+            return
+
+        self._files[file_unique_id] = data
+        self.current_size += len(data)
+
+        while self.current_size > self.max_size:
+            _, evicted = self._files.popitem(last=False)
+            self.current_size -= len(evicted)
+
+    async def load(self, file_unique_id: str, fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Get a file from the cache, or fetch and cache it.
+        Concurrent misses for the same file share one fetch.
+        """
+        data = self.get(file_unique_id)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.misses += 1
+        data = await self._loads.do(file_unique_id, fetch)
+        self.put(file_unique_id, data)
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "files": len(self._files),
+            "size": self.current_size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Shared cache of small files served by the download handler
+small_file_cache = SmallFileCache(Config.SMALL_FILE_CACHE_ITEM_SIZE, Config.SMALL_FILE_CACHE_SIZE)
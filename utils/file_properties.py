@@ -4,7 +4,7 @@ File property extraction from Telegram messages.
 
 from typing import Optional, Dict, Any
 from pyrogram.types import Message
-from pyrogram.file_id import FileId
+from pyrogram.file_id import FileId, FileType
 
 
 def get_media_from_message(message: Message) -> Optional[Any]:
@@ -155,6 +155,38 @@ def get_file_properties(message: Message) -> Dict[str, Any]:
     }
 
 
+def get_file_location(message: Message) -> Optional[Dict[str, Any]]:
+    """
+    Get the decoded file ID fields needed to download a message's media,
+    in the form stored with file records.
+    """
+    file_id_str = get_file_id(message)
+    if not file_id_str:
+        return None
+    
+    file_id = FileId.decode(file_id_str)
+    return {
+        "file_type": int(file_id.file_type),
+        "dc_id": file_id.dc_id,
+        "media_id": file_id.media_id,
+        "access_hash": file_id.access_hash,
+        "file_reference": file_id.file_reference,
+        "thumbnail_size": file_id.thumbnail_size
+    }
+
+
+def decode_file_location(location: Dict[str, Any]) -> FileId:
+    """Rebuild a file ID from stored file location fields."""
+    return FileId(
+        file_type=FileType(location["file_type"]),
+        dc_id=location["dc_id"],
+        media_id=location["media_id"],
+        access_hash=location["access_hash"],
+        file_reference=bytes(location["file_reference"]),
+        thumbnail_size=location.get("thumbnail_size", "")
+    )
+
+
 def is_supported_media(message: Message) -> bool:
     """Check if the message contains supported media."""
     return get_media_from_message(message) is not None
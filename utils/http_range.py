@@ -0,0 +1,208 @@
+"""
+HTTP range (RFC 7233), conditional request (RFC 7232) and content
+negotiation helpers.
+"""
+
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple
+
+# More ranges than this in one request are treated as a full request
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when none of the requested ranges overlap the file."""
+
+
+def parse_range_header(header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a Range header into a list of inclusive (start, end) byte ranges.
+    Supports open-ended (bytes=500-), suffix (bytes=-500) and multiple
+    ranges. Overlapping or adjacent ranges are merged.
+
+    Returns None if the header is malformed, uses another unit or asks for
+    too many ranges, in which case the whole file should be sent.
+    Raises RangeNotSatisfiable if no range overlaps the file.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+
+        start_str, sep, end_str = spec.partition("-")
+        start_str, end_str = start_str.strip(), end_str.strip()
+        if not sep or not (_is_digits(start_str) or start_str == "") or not (_is_digits(end_str) or end_str == ""):
+            return None
+
+        if start_str == "":
+            # Suffix range: the last N bytes
+            if end_str == "":
+                return None
+            suffix_length = int(end_str)
+            # An empty file has no last N bytes
+            if suffix_length == 0 or file_size == 0:
+                continue
+            ranges.append((max(file_size - suffix_length, 0), file_size - 1))
+            continue
+
+        start = int(start_str)
+        if end_str and int(end_str) < start:
+            return None
+        if start >= file_size:
+            continue
+        end = int(end_str) if end_str else file_size - 1
+        ranges.append((start, min(end, file_size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    return _merge_ranges(ranges)
+
+
+def _is_digits(value: str) -> bool:
+    """Check for ASCII digits only (str.isdigit also accepts e.g. "²", which int() rejects)."""
+    return value.isascii() and value.isdigit()
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent ranges, keeping request order otherwise."""
+    if len(ranges) == 1:
+        return ranges
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    # Only reorder if something was actually merged
+    if len(merged) == len(ranges):
+        return ranges
+    return merged
+
+
+def parse_http_date(value: str) -> Optional[datetime]:
+    """Parse an HTTP date into a naive UTC datetime."""
+    try:
+        parsed = parsedate_to_datetime(value.strip())
+    except (TypeError, ValueError):
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return parsed
+
+
+def format_http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date."""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etag: Optional[str],
+    last_modified: Optional[datetime]
+) -> bool:
+    """
+    Check whether a GET/HEAD can be answered with 304 Not Modified.
+    If-None-Match takes precedence and uses weak comparison;
+    If-Modified-Since is only evaluated without it.
+    """
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag[2:] if etag.startswith("W/") else etag
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == opaque:
+                return True
+        return False
+
+    if if_modified_since is not None and last_modified is not None:
+        since = parse_http_date(if_modified_since)
+        return since is not None and last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def if_range_matches(header: str, etag: Optional[str], last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate an If-Range header. The Range header must be ignored (and the
+    full file sent) unless the validator matches the current representation.
+    Only strong ETags and exact Last-Modified dates match.
+    """
+    header = header.strip()
+
+    if header.startswith('"') or header.startswith("W/"):
+        return etag is not None and not header.startswith("W/") and header == etag
+
+    if last_modified is None:
+        return False
+
+    return parse_http_date(header) == last_modified.replace(microsecond=0)
+
+
+def parse_accept_encoding(header: str) -> Set[str]:
+    """Get the content codings an Accept-Encoding header allows (q=0 excluded)."""
+    accepted = set()
+    for value in header.split(","):
+        coding, *params = value.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params:
+            key, _, weight = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(weight)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def multipart_part_header(boundary: str, content_type: str, start: int, end: int, file_size: int) -> bytes:
+    """Build the header of one part of a multipart/byteranges body."""
+    return (
+        f"\r\n--{boundary}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Range: bytes {start}-{end}/{file_size}\r\n"
+        f"\r\n"
+    ).encode("utf-8")
+
+
+def multipart_closing(boundary: str) -> bytes:
+    """Build the closing delimiter of a multipart/byteranges body."""
+    return f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+
+def multipart_content_length(
+    boundary: str,
+    content_type: str,
+    ranges: List[Tuple[int, int]],
+    file_size: int
+) -> int:
+    """Total Content-Length of a multipart/byteranges body."""
+    length = len(multipart_closing(boundary))
+    for start, end in ranges:
+        length += len(multipart_part_header(boundary, content_type, start, end, file_size))
+        length += end - start + 1
+    return length
@@ -0,0 +1,170 @@
+"""
+In-process registry of live streaming sessions.
+Range requests from the same viewer (IP + User-Agent + file) within
+SESSION_MERGE_WINDOW seconds of each other belong to one session, so seeking
+through a video does not create a new session per request. Sessions are
+persisted through the stats buffer: one record per viewer session.
+Bytes are counted live as they are sent and checkpointed to the stats
+buffer at most every STATS_CHECKPOINT_INTERVAL seconds per session.
+"""
+
+import time
+import uuid
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from database.stats import stats_buffer
+from utils.logger import logger
+
+
+@dataclass
+class LiveSession:
+    """A viewer streaming one file, possibly over many requests."""
+    session_id: str
+    message_id: int
+    user_id: int
+    ip_address: str
+    user_agent: str
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    last_active: float = field(default_factory=time.monotonic)
+    bytes_sent: int = 0
+    requests: int = 0
+    # Requests of this session still streaming
+    active: int = 0
+    # Bytes sent since the last checkpoint
+    unsaved_bytes: int = 0
+    last_checkpoint: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> dict:
+        """Session fields in the same shape as stored session records."""
+        return {
+            "session_id": self.session_id,
+            "message_id": self.message_id,
+            "user_id": self.user_id,
+            "ip_address": self.ip_address,
+            "user_agent": self.user_agent,
+            "started_at": self.started_at,
+            "bytes_sent": self.bytes_sent,
+            "requests": self.requests,
+            "is_active": True
+        }
+
+
+class SessionRegistry:
+    """Live sessions keyed by (IP, User-Agent, message_id)."""
+
+    def __init__(self, merge_window: int, checkpoint_interval: int):
+        self.merge_window = merge_window
+        self.checkpoint_interval = checkpoint_interval
+        self._sessions: Dict[Tuple[str, str, int], LiveSession] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def open(self, message_id: int, user_id: int, ip_address: str, user_agent: str) -> LiveSession:
+        """Get the viewer's live session for a file, starting one if needed."""
+        key = (ip_address, user_agent, message_id)
+        session = self._sessions.get(key)
+
+        if session is None or self._expired(session, time.monotonic()):
+            if session is not None:
+                self._end(key, session)
+            session = LiveSession(str(uuid.uuid4()), message_id, user_id, ip_address, user_agent)
+            self._sessions[key] = session
+            stats_buffer.create_session(session.session_id, message_id, user_id, ip_address, user_agent)
+
+        session.requests += 1
+        session.active += 1
+        session.last_active = time.monotonic()
+        return session
+
+    def progress(self, session: LiveSession, bytes_sent: int) -> None:
+        """Count bytes sent by a request, checkpointing them once the interval has passed."""
+        now = time.monotonic()
+        session.bytes_sent += bytes_sent
+        session.unsaved_bytes += bytes_sent
+        session.last_active = now
+
+        if now - session.last_checkpoint >= self.checkpoint_interval:
+            self._checkpoint(session, now)
+
+    def close(self, session: LiveSession) -> None:
+        """
+        Finish one request of a session and count it as a file access.
+        The session stays open for the merge window.
+        """
+        now = time.monotonic()
+        session.active -= 1
+        session.last_active = now
+        self._checkpoint(session, now)
+        stats_buffer.update_file_access(session.message_id, 0)
+
+    def _checkpoint(self, session: LiveSession, now: float) -> None:
+        """Hand unsaved bytes to the stats buffer (this also keeps the stored session from expiring)."""
+        sent, session.unsaved_bytes = session.unsaved_bytes, 0
+        session.last_checkpoint = now
+
+        stats_buffer.update_session(session.session_id, sent)
+        if sent:
+            stats_buffer.update_file_access(session.message_id, sent, accesses=0)
+            if session.user_id:
+                stats_buffer.update_user_bandwidth(session.user_id, sent)
+
+    def _expired(self, session: LiveSession, now: float) -> bool:
+        return session.active == 0 and now - session.last_active > self.merge_window
+
+    def _end(self, key: Tuple[str, str, int], session: LiveSession) -> None:
+        self._sessions.pop(key, None)
+        stats_buffer.end_session(session.session_id)
+
+    def reap(self) -> None:
+        """
+        End sessions that have been idle for longer than the merge window,
+        and checkpoint streaming ones that have not sent anything lately.
+        """
+        now = time.monotonic()
+        for key, session in list(self._sessions.items()):
+            if self._expired(session, now):
+                self._end(key, session)
+            elif session.active and now - session.last_checkpoint >= self.checkpoint_interval:
+                self._checkpoint(session, now)
+
+    def sessions(self) -> List[dict]:
+        """Live sessions, newest first."""
+        return sorted(
+            (session.to_dict() for session in self._sessions.values()),
+            key=lambda s: s["started_at"],
+            reverse=True
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(max(1, min(self.merge_window, self.checkpoint_interval) // 2))
+            self.reap()
+
+    def start(self) -> None:
+        """Start ending idle sessions periodically."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the reaper and end every live session."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for key, session in list(self._sessions.items()):
+            self._checkpoint(session, time.monotonic())
+            self._end(key, session)
+        logger.info("Live sessions closed")
+
+
+# Shared registry of sessions served by the web server
+live_sessions = SessionRegistry(Config.SESSION_MERGE_WINDOW, Config.STATS_CHECKPOINT_INTERVAL)
@@ -0,0 +1,75 @@
+"""
+Cache for log channel messages resolved through Telegram.
+Avoids a get_messages round trip on every stream/player request.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from cachetools import TTLCache
+from pyrogram import Client
+from pyrogram.types import Message
+from config import Config
+from utils.file_properties import get_file_properties
+
+
+class MessageCache:
+    """
+    Bounded TTL cache of log channel messages and their file properties.
+    Entries are keyed by (client name, message_id) because file references
+    and access hashes are only valid for the client that fetched them.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    async def get(
+        self,
+        client: Client,
+        message_id: int,
+        refresh: bool = False
+    ) -> Tuple[Optional[Message], Optional[Dict[str, Any]]]:
+        """
+        Get a log channel message and its file properties.
+        Pass refresh=True after FileReferenceExpired/FileReferenceInvalid
+        to force a fresh fetch from Telegram.
+        """
+        key = (client.name, message_id)
+
+        if refresh:
+            self.refreshes += 1
+            self._cache.pop(key, None)
+        else:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        message = await client.get_messages(Config.LOG_CHANNEL, message_id)
+
+        if not message or not message.media:
+            return None, None
+
+        entry = (message, get_file_properties(message))
+        self._cache[key] = entry
+        return entry
+
+    def invalidate(self, message_id: int) -> None:
+        """Drop a message from the cache for every client."""
+        for key in [k for k in self._cache.keys() if k[1] == message_id]:
+            self._cache.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes
+        }
+
+
+# Shared cache used by the web handlers and the chunk streamer
+message_cache = MessageCache(Config.MESSAGE_CACHE_SIZE, Config.MESSAGE_CACHE_TTL)
@@ -0,0 +1,87 @@
+"""
+Cache of rendered player pages, stored with precompressed variants.
+"""
+
+import gzip
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from cachetools import TTLCache
+from config import Config
+from utils.http_range import parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@dataclass
+class RenderedPage:
+    """A rendered page, its compressed encodings and extra response headers."""
+    html: bytes
+    gzip: bytes
+    br: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def encode(self, accept_encoding: str):
+        """Pick the smallest encoding the client accepts; returns (body, encoding or None)."""
+        accepted = parse_accept_encoding(accept_encoding)
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.html, None
+
+
+class PageCache:
+    """
+    Bounded TTL cache of rendered player pages keyed by (message_id, hash).
+    Pages of revoked links must be invalidated.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, message_id: int, auth_hash: str) -> Optional[RenderedPage]:
+        """Get a rendered page."""
+        page = self._cache.get((message_id, auth_hash))
+        if page is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return page
+
+    def put(self, message_id: int, auth_hash: str, html: str, headers: Optional[Dict[str, str]] = None) -> RenderedPage:
+        """Compress and cache a rendered page."""
+        data = html.encode("utf-8")
+        page = RenderedPage(
+            html=data,
+            gzip=gzip.compress(data, compresslevel=6),
+            br=brotli.compress(data) if brotli else None,
+            headers={k: v for k, v in (headers or {}).items() if v}
+        )
+        self._cache[(message_id, auth_hash)] = page
+        return page
+
+    def invalidate(self, message_id: int) -> None:
+        """Drop every cached page of a message."""
+        for key in [k for k in self._cache.keys() if k[0] == message_id]:
+            self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached pages."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Shared cache of rendered player pages
+page_cache = PageCache(Config.PLAYER_CACHE_SIZE, Config.PLAYER_CACHE_TTL)
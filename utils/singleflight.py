@@ -0,0 +1,58 @@
+"""
+Single-flight coalescing of concurrent identical async calls.
+Callers asking for the same key while a call is in flight share its result
+instead of starting their own.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+    The shared call keeps running while any caller still waits for it and
+    is cancelled once every caller has gone away.
+    """
+
+    def __init__(self):
+        # key -> [task, number of waiting callers]
+        self._calls: Dict[Hashable, list] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn for key, or wait for the call already in flight for it."""
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.create_task(fn())
+            call = [task, 0]
+            self._calls[key] = call
+            task.add_done_callback(lambda _, call=call: self._forget(key, call))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not task.done():
+                # Nobody is waiting for the result anymore
+                task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: Hashable, call: list) -> None:
+        # A newer call may already be registered under the same key
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Get coalescing counters."""
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "shared": self.shared
+        }
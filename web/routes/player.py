@@ -4,38 +4,70 @@ Combined handler - serves both player UI and file downloads.
 """
 
 import os
+import json
 import uuid
+import hashlib
+import mimetypes
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from aiohttp import web
 from jinja2 import Template
-from pyrogram.errors import FileReferenceExpired, FileReferenceInvalid
 from config import Config
 from bot.workers import get_main_bot
+from bot.streamer import stream_file_chunks
 from bot.client import bot_username
-from database.files import get_file_by_message_id, is_file_revoked, update_file_access
-from database.sessions import create_session, update_session, end_session
-from database.users import update_user_bandwidth
+from database.file_index import FileAccess, FileDetails, file_index
 from utils.hashing import pack_file, check_hash
-from utils.file_properties import get_file_properties, get_file_id
+from utils.message_cache import message_cache
+from utils.file_cache import small_file_cache
+from utils.live_sessions import live_sessions
+from utils.page_cache import page_cache
+from utils.http_range import (
+    RangeNotSatisfiable,
+    parse_range_header,
+    if_range_matches,
+    is_not_modified,
+    parse_accept_encoding,
+    format_http_date,
+    multipart_part_header,
+    multipart_closing,
+    multipart_content_length
+)
 from utils.helpers import format_bytes, extract_telegram_link, extract_username
 from utils.logger import logger
 
-# Chunk size for streaming (1MB)
-CHUNK_SIZE = 1024 * 1024
+# Compiled player HTML template
+PLAYER_TEMPLATE: Optional[Template] = None
 
-# Player HTML template
-PLAYER_TEMPLATE = None
+# Static assets kept in memory: filename -> (body, content type, ETag, precompressed bodies)
+ASSETS: Optional[Dict[str, Tuple[bytes, str, str, Dict[str, bytes]]]] = None
 
+# Built player assets from scripts/build_assets.py (empty if not built)
+ASSET_MANIFEST: dict = {}
 
-def get_player_template() -> str:
-    """Load player template."""
+# Directories under web/static served at /assets/
+ASSET_DIRS = ("images", "dist")
+
+# Precompressed copies are stored next to the asset with these extensions
+ASSET_ENCODINGS = {".gz": "gzip", ".br": "br"}
+
+# Content types mimetypes may not know
+ASSET_TYPES = {".woff2": "font/woff2", ".js": "text/javascript", ".css": "text/css"}
+
+# Assets only change with a deploy
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def get_player_template() -> Template:
+    """Load and compile the player template (once)."""
     global PLAYER_TEMPLATE
     if PLAYER_TEMPLATE is None:
         template_path = os.path.join(os.path.dirname(__file__), "..", "templates", "player.html")
         if os.path.exists(template_path):
             with open(template_path, "r", encoding="utf-8") as f:
-                PLAYER_TEMPLATE = f.read()
+                PLAYER_TEMPLATE = Template(f.read())
         else:
-            PLAYER_TEMPLATE = get_fallback_template()
+            PLAYER_TEMPLATE = Template(get_fallback_template())
     return PLAYER_TEMPLATE
 
 
@@ -57,74 +89,120 @@ async def player_handler(request: web.Request) -> web.Response:
     if request.query.get("d") == "true":
         return await download_handler(request)
     
-    # Use main bot for message retrieval (it has the peer cached reliably)
-    main_bot = get_main_bot()
-    if not main_bot:
-        return web.Response(status=503, text="Bot not available")
-    
     try:
-        # Get the message using main bot
-        message = await main_bot.get_messages(Config.LOG_CHANNEL, message_id)
-        
-        if not message or not message.media:
-            return web.Response(status=404, text="File not found")
-        
-        # Get file properties
-        props = get_file_properties(message)
-        
-        # Verify hash
-        expected_hash = pack_file(
-            props["file_name"],
-            props["file_size"],
-            props["mime_type"],
-            props["file_id_num"]
-        )
-        
-        if not check_hash(auth_hash, expected_hash):
-            return web.Response(status=400, text="Invalid hash")
-        
-        # Build URLs - all using /player/ now
-        stream_url = f"{Config.HOST}/dl/{message_id}?hash={auth_hash}"
-        download_url = f"{Config.HOST}/dl/{message_id}?hash={auth_hash}&d=true"
-        
-        # Stream URL without protocol for intent:// links
-        stream_url_no_protocol = stream_url.replace("http://", "").replace("https://", "")
-        
-        # Bot URL
-        bot_name = bot_username or "FileStreamBot"
-        telegram_bot_url = f"https://t.me/{bot_name}?start=file_{message_id}"
+        # Rendered pages are cached until they expire or the link is revoked
+        page = page_cache.get(message_id, auth_hash)
         
-        # Support URL
-        support_url = extract_telegram_link(Config.SUPPORT_INFO)
-        if not support_url:
-            username = extract_username(Config.SUPPORT_INFO)
-            support_url = f"https://t.me/{username}" if username else "https://t.me/EverythingSuckz"
-        
-        # Template data
-        data = {
-            "FileName": props["file_name"],
-            "FileSize": format_bytes(props["file_size"]),
-            "MimeType": props["mime_type"],
-            "StreamURL": stream_url,
-            "StreamURLNoProtocol": stream_url_no_protocol,
-            "DownloadURL": download_url,
-            "TelegramBotURL": telegram_bot_url,
-            "SupportURL": support_url,
-            "MessageID": message_id,
-            "Hash": auth_hash
-        }
+        if page is None:
+            file_access = await file_index.get(message_id)
+            if file_access and file_access.revoked:
+                return web.Response(status=403, text="This link has been revoked")
+            
+            file_details = None
+            if file_access and file_access.file_hash:
+                # Stored files are verified and described from their record
+                if not check_hash(auth_hash, file_access.file_hash):
+                    return web.Response(status=400, text="Invalid hash")
+                file_details = await file_index.get_details(message_id)
+            
+            if file_details:
+                props = {
+                    "file_name": file_details.file_name,
+                    "file_size": file_details.file_size,
+                    "mime_type": file_details.mime_type
+                }
+            else:
+                props, error = await get_verified_message_props(message_id, auth_hash)
+                if error:
+                    return error
+            
+            stream_url = f"{Config.HOST}/dl/{message_id}?hash={auth_hash}"
+            page = page_cache.put(
+                message_id,
+                auth_hash,
+                render_player_page(message_id, auth_hash, props),
+                headers={"Link": get_preload_links(stream_url, props["mime_type"])}
+            )
         
-        # Render template
-        template = Template(get_player_template())
-        html = template.render(**data)
+        body, encoding = page.encode(request.headers.get("Accept-Encoding", ""))
+        headers = {"Vary": "Accept-Encoding", **page.headers}
+        if encoding:
+            headers["Content-Encoding"] = encoding
         
-        return web.Response(text=html, content_type="text/html", charset="utf-8")
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers=headers)
         
     except Exception as e:
         logger.error(f"Player error for message {message_id}: {e}")
         return web.Response(status=500, text=f"Error: {str(e)}")
 
 
+async def get_verified_message_props(message_id: int, auth_hash: str) -> Tuple[Optional[dict], Optional[web.Response]]:
+    """
+    Verify a link against the Telegram message, for files without a stored record.
+    Returns the file properties, or an error response.
+    """
+    # Use main bot for message retrieval (it has the peer cached reliably)
+    main_bot = get_main_bot()
+    if not main_bot:
+        return None, web.Response(status=503, text="Bot not available")
+    
+    # Get the message and its properties using main bot (cached)
+    message, props = await message_cache.get(main_bot, message_id)
+    
+    if not message:
+        return None, web.Response(status=404, text="File not found")
+    
+    # Verify hash
+    expected_hash = pack_file(
+        props["file_name"],
+        props["file_size"],
+        props["mime_type"],
+        props["file_id_num"]
+    )
+    
+    if not check_hash(auth_hash, expected_hash):
+        return None, web.Response(status=400, text="Invalid hash")
+    
+    return props, None
+
+
+def render_player_page(message_id: int, auth_hash: str, props: dict) -> str:
+    """Render the player page of a file."""
+    # Build URLs - all using /player/ now
+    stream_url = f"{Config.HOST}/dl/{message_id}?hash={auth_hash}"
+    download_url = f"{Config.HOST}/dl/{message_id}?hash={auth_hash}&d=true"
+    
+    # Stream URL without protocol for intent:// links
+    stream_url_no_protocol = stream_url.replace("http://", "").replace("https://", "")
+    
+    # Bot URL
+    bot_name = bot_username or "FileStreamBot"
+    telegram_bot_url = f"https://t.me/{bot_name}?start=file_{message_id}"
+    
+    # Support URL
+    support_url = extract_telegram_link(Config.SUPPORT_INFO)
+    if not support_url:
+        username = extract_username(Config.SUPPORT_INFO)
+        support_url = f"https://t.me/{username}" if username else "https://t.me/EverythingSuckz"
+    
+    # Template data
+    data = {
+        "FileName": props["file_name"],
+        "FileSize": format_bytes(props["file_size"]),
+        "MimeType": props["mime_type"],
+        "StreamURL": stream_url,
+        "StreamURLNoProtocol": stream_url_no_protocol,
+        "DownloadURL": download_url,
+        "TelegramBotURL": telegram_bot_url,
+        "SupportURL": support_url,
+        "MessageID": message_id,
+        "Hash": auth_hash,
+        "Assets": get_asset_manifest()
+    }
+    
+    return get_player_template().render(**data)
+
+
 async def download_handler(request: web.Request) -> web.StreamResponse:
     """Handle file streaming/download requests."""
     
@@ -139,122 +217,143 @@ async def download_handler(request: web.Request) -> web.StreamResponse:
     if not auth_hash:
         return web.Response(status=400, text="Missing hash parameter")
     
-    # Check if file is revoked
-    revoked = await is_file_revoked(message_id)
-    if revoked:
+    # Revocation, ownership and hashes come from the in-memory file index
+    file_access = await file_index.get(message_id)
+    if file_access and file_access.revoked:
         return web.Response(status=403, text="This link has been revoked")
     
-    # Use main bot to get the message (it has the peer cached reliably)
-    main_bot = get_main_bot()
-    if not main_bot:
-        return web.Response(status=503, text="Bot not available")
+    file_owner_id = file_access.user_id if file_access else 0
     
     try:
-        # Get the message from Telegram using main bot
-        message = await main_bot.get_messages(Config.LOG_CHANNEL, message_id)
-        
-        if not message or not message.media:
-            return web.Response(status=404, text="File not found")
-        
-        # Get file properties
-        props = get_file_properties(message)
+        file_details = None
+        if file_access and file_access.file_hash:
+            # Stored files are verified and described from their record;
+            # Telegram is only contacted once file bytes are needed
+            if not check_hash(auth_hash, file_access.file_hash):
+                return web.Response(status=400, text="Invalid hash")
+            file_details = await file_index.get_details(message_id)
         
-        # Verify hash
-        expected_hash = pack_file(
-            props["file_name"],
-            props["file_size"],
-            props["mime_type"],
-            props["file_id_num"]
-        )
+        etag, last_modified = get_validators(file_access, file_details)
         
-        if not check_hash(auth_hash, expected_hash):
-            return web.Response(status=400, text="Invalid hash")
+        if file_details:
+            file_size = file_details.file_size
+            file_name = file_details.file_name
+            mime_type = file_details.mime_type
+            file_key = file_access.file_hash
+        else:
+            props, error = await get_verified_message_props(message_id, auth_hash)
+            if error:
+                return error
+            
+            file_size = props["file_size"]
+            file_name = props["file_name"]
+            mime_type = props["mime_type"]
+            file_key = props["file_unique_id"]
+            
+            # Files without a stored record fall back to Telegram's unique ID
+            if etag is None and file_key:
+                etag = f'"{file_key}"'
         
-        # Get file owner for bandwidth tracking
-        db_file = await get_file_by_message_id(message_id)
-        file_owner_id = db_file.get("user_id", 0) if db_file else 0
+        mime_type = mime_type or "application/octet-stream"
         
-        # Create session
-        session_id = str(uuid.uuid4())
-        client_ip = request.remote or "unknown"
-        user_agent = request.headers.get("User-Agent", "unknown")
-        await create_session(session_id, message_id, file_owner_id, client_ip, user_agent)
+        if is_not_modified_request(request, etag, last_modified):
+            return web.Response(status=304, headers=get_cache_headers(etag, last_modified))
         
-        file_size = props["file_size"]
-        file_name = props["file_name"]
-        mime_type = props["mime_type"] or "application/octet-stream"
+        headers = get_cache_headers(etag, last_modified)
+        headers["Accept-Ranges"] = "bytes"
+        headers["Content-Disposition"] = get_content_disposition(request, file_name)
         
-        # Handle range requests
+        # Handle range requests (ignored if If-Range no longer matches)
+        ranges = None
         range_header = request.headers.get("Range", "")
+        if_range = request.headers.get("If-Range")
         
-        if range_header:
-            # Parse range header
+        if range_header and (if_range is None or if_range_matches(if_range, etag, last_modified)):
             try:
-                range_spec = range_header.replace("bytes=", "")
-                start_str, end_str = range_spec.split("-")
-                start = int(start_str) if start_str else 0
-                end = int(end_str) if end_str else file_size - 1
-            except:
-                start = 0
-                end = file_size - 1
-            
-            # Ensure valid range
-            if start >= file_size:
-                return web.Response(status=416, text="Range not satisfiable")
-            end = min(end, file_size - 1)
-            
-            content_length = end - start + 1
-            
-            response = web.StreamResponse(
-                status=206,
-                headers={
-                    "Content-Type": mime_type,
-                    "Content-Length": str(content_length),
-                    "Content-Range": f"bytes {start}-{end}/{file_size}",
-                    "Accept-Ranges": "bytes",
-                    "Content-Disposition": get_content_disposition(request, file_name)
-                }
-            )
+                ranges = parse_range_header(range_header, file_size)
+            except RangeNotSatisfiable:
+                return web.Response(
+                    status=416,
+                    text="Range not satisfiable",
+                    headers={"Content-Range": f"bytes */{file_size}", "Accept-Ranges": "bytes"}
+                )
+        
+        boundary = None
+        
+        if ranges is None:
+            ranges = [(0, file_size - 1)]
+            status = 200
+            headers["Content-Type"] = mime_type
+            headers["Content-Length"] = str(file_size)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            status = 206
+            headers["Content-Type"] = mime_type
+            headers["Content-Length"] = str(end - start + 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
         else:
-            start = 0
-            end = file_size - 1
-            content_length = file_size
-            
-            response = web.StreamResponse(
-                status=200,
-                headers={
-                    "Content-Type": mime_type,
-                    "Content-Length": str(content_length),
-                    "Accept-Ranges": "bytes",
-                    "Content-Disposition": get_content_disposition(request, file_name)
-                }
+            # Several ranges are sent as a multipart/byteranges body
+            boundary = uuid.uuid4().hex
+            status = 206
+            headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+            headers["Content-Length"] = str(multipart_content_length(boundary, mime_type, ranges, file_size))
+        
+        # HEAD and empty responses are answered from metadata alone:
+        # they send no file data, so no session is opened and no stats are written
+        if request.method == "HEAD" or headers["Content-Length"] == "0":
+            response = web.StreamResponse(status=status, headers=headers)
+            await response.prepare(request)
+            await response.write_eof()
+            return response
+        
+        # File bytes are fetched with the main bot and workers
+        if not get_main_bot():
+            return web.Response(status=503, text="Bot not available")
+        
+        # Small files are read whole (once) and kept in memory
+        small_file = None
+        if file_key and small_file_cache.fits(file_size):
+            small_file = await small_file_cache.load(
+                file_key,
+                lambda: read_whole_file(message_id, file_size)
             )
         
+        response = web.StreamResponse(status=status, headers=headers)
         await response.prepare(request)
         
-        # Stream the file
-        if request.method != "HEAD":
-            bytes_sent = 0
-            
-            try:
-                # Always use main bot for streaming (workers may not have channel access)
-                # Fetch fresh message to avoid FILE_REFERENCE_EXPIRED
-                async for chunk in stream_file_chunks(main_bot, message_id, start, end):
-                    await response.write(chunk)
-                    bytes_sent += len(chunk)
+        # Requests from the same viewer for this file share a live session
+        client_ip = request.remote or "unknown"
+        user_agent = request.headers.get("User-Agent", "unknown")
+        session = live_sessions.open(message_id, file_owner_id, client_ip, user_agent)
+        
+        # Stream the file (bytes sent are counted live and saved periodically)
+        try:
+            if small_file is not None:
+                # Answer from memory in a single write
+                body = build_body(small_file, ranges, boundary, mime_type, file_size)
+                await response.write(body)
+                live_sessions.progress(session, sum(end - start + 1 for start, end in ranges))
+            else:
+                for start, end in ranges:
+                    if boundary:
+                        await response.write(multipart_part_header(boundary, mime_type, start, end, file_size))
+                    
+                    # Chunk fetches are spread across the main bot and workers with channel access
+                    async for chunk in stream_file_chunks(message_id, start, end):
+                        await response.write(chunk)
+                        live_sessions.progress(session, len(chunk))
                 
-            except ConnectionResetError:
-                logger.debug(f"Client disconnected while streaming file {message_id}")
-            except Exception as e:
-                logger.error(f"Error streaming file {message_id}: {e}")
+                if boundary:
+                    await response.write(multipart_closing(boundary))
             
-            finally:
-                # Update stats
-                await update_session(session_id, bytes_sent)
-                await end_session(session_id)
-                await update_file_access(message_id, bytes_sent)
-                if file_owner_id:
-                    await update_user_bandwidth(file_owner_id, bytes_sent)
+        except ConnectionResetError:
+            logger.debug(f"Client disconnected while streaming file {message_id}")
+        except Exception as e:
+            logger.error(f"Error streaming file {message_id}: {e}")
+        
+        finally:
+            # Save the remaining progress and count the access
+            live_sessions.close(session)
         
         await response.write_eof()
         return response
@@ -264,73 +363,65 @@ async def download_handler(request: web.Request) -> web.StreamResponse:
         return web.Response(status=500, text=f"Error: {str(e)}")
 
 
-async def stream_file_chunks(client, message_id: int, start: int, end: int):
-    """
-    Stream file in chunks using Pyrogram's download functionality.
-    Yields chunks of data between start and end bytes.
-    Always fetches fresh message to avoid FILE_REFERENCE_EXPIRED.
-    """
-    # Calculate the offset in MB (Pyrogram's stream_media uses offset as chunk number)
-    offset_mb = start // CHUNK_SIZE
-    bytes_to_skip = start % CHUNK_SIZE
-    bytes_remaining = end - start + 1
+async def read_whole_file(message_id: int, file_size: int) -> bytes:
+    """Read a whole (small) file through the chunk streamer."""
+    data = b"".join([chunk async for chunk in stream_file_chunks(message_id, 0, file_size - 1)])
     
-    max_retries = 3
+    # A short read must not be cached and served as the whole file
+    if len(data) != file_size:
+        raise Exception(f"Read {len(data)} of {file_size} bytes of file {message_id}")
+    return data
+
+
+def build_body(data: bytes, ranges: List[Tuple[int, int]], boundary: Optional[str], content_type: str, file_size: int):
+    """Build a complete response body for the requested ranges of an in-memory file."""
+    if not boundary:
+        start, end = ranges[0]
+        return memoryview(data)[start:end + 1]
     
-    for attempt in range(max_retries):
-        try:
-            # Always fetch fresh message to get valid file reference
-            message = await client.get_messages(Config.LOG_CHANNEL, message_id)
-            if not message or not message.media:
-                raise Exception("Message not found or has no media")
-            
-            file_id = get_file_id(message)
-            if not file_id:
-                raise Exception("Could not get file ID from message")
-            
-            # Reset counters for each attempt
-            current_bytes_to_skip = bytes_to_skip
-            current_bytes_remaining = bytes_remaining
-            
-            # Pyrogram's stream_media returns an async generator that yields chunks
-            async for chunk in client.stream_media(message, offset=offset_mb):
-                if current_bytes_remaining <= 0:
-                    break
-                    
-                chunk_data = bytes(chunk)
-                
-                # Skip bytes if needed (for range requests that don't start at chunk boundary)
-                if current_bytes_to_skip > 0:
-                    skip_amount = min(current_bytes_to_skip, len(chunk_data))
-                    chunk_data = chunk_data[skip_amount:]
-                    current_bytes_to_skip -= skip_amount
-                
-                if len(chunk_data) == 0:
-                    continue
-                    
-                # Trim chunk if we've reached the end
-                if len(chunk_data) > current_bytes_remaining:
-                    chunk_data = chunk_data[:current_bytes_remaining]
-                
-                current_bytes_remaining -= len(chunk_data)
-                yield chunk_data
-            
-            # If we get here without error, we're done
-            return
-            
-        except (FileReferenceExpired, FileReferenceInvalid) as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"File reference expired, retrying (attempt {attempt + 2}/{max_retries})")
-                continue
-            else:
-                logger.error(f"File reference expired after {max_retries} attempts: {e}")
-                raise
-                
-        except Exception as e:
-            logger.error(f"Error in stream_file_chunks (attempt {attempt + 1}): {e}")
-            if attempt < max_retries - 1:
-                continue
-            raise
+    parts = []
+    for start, end in ranges:
+        parts.append(multipart_part_header(boundary, content_type, start, end, file_size))
+        parts.append(memoryview(data)[start:end + 1])
+    parts.append(multipart_closing(boundary))
+    return b"".join(parts)
+
+
+def get_validators(
+    file_access: Optional[FileAccess],
+    file_details: Optional[FileDetails]
+) -> Tuple[Optional[str], Optional[datetime]]:
+    """Get the ETag and Last-Modified of a stored file."""
+    if not file_access:
+        return None, None
+    
+    etag = f'"{file_access.file_hash}"' if file_access.file_hash else None
+    return etag, file_details.uploaded_at if file_details else None
+
+
+def get_cache_headers(etag: Optional[str], last_modified: Optional[datetime]) -> dict:
+    """Get validator and caching headers for a file response."""
+    # Files never change, but revoked links must stop working eventually
+    if Config.CACHE_MAX_AGE > 0:
+        headers = {"Cache-Control": f"public, max-age={Config.CACHE_MAX_AGE}"}
+    else:
+        headers = {"Cache-Control": "no-cache"}
+    
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
+
+
+def is_not_modified_request(request: web.Request, etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Check the request's conditional headers against the file validators."""
+    return is_not_modified(
+        request.headers.get("If-None-Match"),
+        request.headers.get("If-Modified-Since"),
+        etag,
+        last_modified
+    )
 
 
 def get_content_disposition(request: web.Request, file_name: str) -> str:
@@ -346,31 +437,95 @@ def get_content_disposition(request: web.Request, file_name: str) -> str:
     return f'{disposition}; filename="{safe_name}"'
 
 
-async def assets_handler(request: web.Request) -> web.Response:
-    """Serve static assets."""
-    filename = request.match_info["filename"]
+def load_assets() -> Dict[str, Tuple[bytes, str, str, Dict[str, bytes]]]:
+    """
+    Load static assets (and the built player assets, if any) into memory
+    with their content type, ETag and precompressed copies (once).
+    """
+    global ASSETS, ASSET_MANIFEST
+    if ASSETS is None:
+        assets = {}
+        encoded = {}
+        manifest = {}
+        static_dir = os.path.join(os.path.dirname(__file__), "..", "static")
+        
+        for directory in ASSET_DIRS:
+            path = os.path.join(static_dir, directory)
+            if not os.path.isdir(path):
+                continue
+            
+            for entry in os.scandir(path):
+                if not entry.is_file():
+                    continue
+                with open(entry.path, "rb") as f:
+                    data = f.read()
+                
+                name, ext = os.path.splitext(entry.name)
+                if entry.name == "manifest.json":
+                    manifest = json.loads(data)
+                elif ext in ASSET_ENCODINGS:
+                    encoded[(name, ASSET_ENCODINGS[ext])] = data
+                else:
+                    content_type = ASSET_TYPES.get(ext) or mimetypes.guess_type(entry.name)[0] or "application/octet-stream"
+                    etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+                    assets[entry.name] = (data, content_type, etag, {})
+        
+        for (name, encoding), data in encoded.items():
+            if name in assets:
+                assets[name][3][encoding] = data
+        
+        # Only use a build whose files are all present
+        if manifest and manifest.get("player.css") in assets and manifest.get("player.js") in assets:
+            ASSET_MANIFEST = manifest
+            logger.info(f"Using built player assets: {manifest['player.css']}, {manifest['player.js']}")
+        
+        ASSETS = assets
+    return ASSETS
+
+
+def get_asset_manifest() -> dict:
+    """Get the built player assets, or an empty dict to use the inline template and CDNs."""
+    load_assets()
+    return ASSET_MANIFEST
+
+
+def get_preload_links(stream_url: str, mime_type: str) -> str:
+    """Build a Link header preloading the stream and the page's critical assets."""
+    links = []
+    if mime_type and mime_type.startswith(("video/", "audio/")):
+        links.append(f"<{stream_url}>; rel=preload; as={mime_type.split('/')[0]}")
     
-    static_dir = os.path.join(os.path.dirname(__file__), "..", "static", "images")
-    file_path = os.path.join(static_dir, filename)
+    manifest = get_asset_manifest()
+    if manifest:
+        links.append(f"</assets/{manifest['player.css']}>; rel=preload; as=style")
+        for font in manifest.get("preload", []):
+            links.append(f'</assets/{font}>; rel=preload; as=font; type="font/woff2"; crossorigin')
     
-    if not os.path.exists(file_path):
+    return ", ".join(links)
+
+
+async def assets_handler(request: web.Request) -> web.Response:
+    """Serve static assets from memory."""
+    asset = load_assets().get(request.match_info["filename"])
+    if asset is None:
         return web.Response(status=404, text="Asset not found")
     
-    # Determine content type
-    content_type = "application/octet-stream"
-    if filename.endswith(".png"):
-        content_type = "image/png"
-    elif filename.endswith((".jpg", ".jpeg")):
-        content_type = "image/jpeg"
-    elif filename.endswith(".svg"):
-        content_type = "image/svg+xml"
-    elif filename.endswith(".gif"):
-        content_type = "image/gif"
+    data, content_type, etag, encodings = asset
+    headers = {"Cache-Control": ASSET_CACHE_CONTROL, "ETag": etag}
+    if encodings:
+        headers["Vary"] = "Accept-Encoding"
+    
+    if is_not_modified(request.headers.get("If-None-Match"), None, etag, None):
+        return web.Response(status=304, headers=headers)
     
-    with open(file_path, "rb") as f:
-        data = f.read()
+    accepted = parse_accept_encoding(request.headers.get("Accept-Encoding", ""))
+    for encoding in ("br", "gzip"):
+        if encoding in encodings and encoding in accepted:
+            data = encodings[encoding]
+            headers["Content-Encoding"] = encoding
+            break
     
-    return web.Response(body=data, content_type=content_type)
+    return web.Response(body=data, content_type=content_type, headers=headers)
 
 
 def get_fallback_template() -> str:
@@ -14,7 +14,19 @@ async def start_web_server():
     """Start the aiohttp web server."""
     global app, runner
     
-    from web.routes.player import player_handler, download_handler, assets_handler
+    from web.routes.player import player_handler, download_handler, assets_handler, get_player_template, load_assets
+    from utils.chunk_cache import chunk_cache
+    from utils.live_sessions import live_sessions
+    
+    # Index chunks cached on disk by previous runs
+    await chunk_cache.load()
+    
+    # Compile the player template and load static assets before serving
+    get_player_template()
+    load_assets()
+    
+    # End viewer sessions once they go idle
+    live_sessions.start()
     
     app = web.Application()
     
@@ -41,9 +53,13 @@ async def stop_web_server():
     """Stop the web server."""
     global runner
     
+    from utils.live_sessions import live_sessions
+    
     if runner:
         await runner.cleanup()
         logger.info("Web server stopped")
+    
+    await live_sessions.stop()
 
 
 async def home_handler(request: web.Request) -> web.Response: